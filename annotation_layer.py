@@ -0,0 +1,77 @@
+import math
+
+from PyQt5.QtCore import Qt, QRect, QRectF
+from PyQt5.QtGui import QImage, QPainter
+
+TILE_SIZE = 256
+
+
+class TiledLayer:
+    """Прозрачный слой аннотаций: память выделяется только под тайлы, которых касались штрихи."""
+
+    def __init__(self, tile_size=TILE_SIZE):
+        self.tile_size = tile_size
+        self.tiles = {}
+
+    def clear(self):
+        self.tiles.clear()
+
+    def is_empty(self):
+        return not self.tiles
+
+    @property
+    def nbytes(self):
+        return sum(tile.sizeInBytes() for tile in self.tiles.values())
+
+    def tile_keys(self, rect):
+        if rect.isEmpty():
+            return
+        size = self.tile_size
+        for ty in range(rect.top() // size, rect.bottom() // size + 1):
+            for tx in range(rect.left() // size, rect.right() // size + 1):
+                yield tx, ty
+
+    def tile_rect(self, key):
+        return QRect(key[0] * self.tile_size, key[1] * self.tile_size, self.tile_size, self.tile_size)
+
+    def tile(self, key):
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = QImage(self.tile_size, self.tile_size, QImage.Format_ARGB32_Premultiplied)
+            tile.fill(Qt.transparent)
+            self.tiles[key] = tile
+        return tile
+
+    def path_bounds(self, path, pen):
+        pad = math.ceil(pen.widthF()) + 2
+        return path.boundingRect().toAlignedRect().adjusted(-pad, -pad, pad, pad)
+
+    def paint_path(self, path, pen, keys=None):
+        # Рисуем штрих прямо в затронутые тайлы, без копии всего слоя
+        bounds = self.path_bounds(path, pen)
+        for key in self.tile_keys(bounds):
+            if keys is not None and key not in keys:
+                continue
+            painter = QPainter(self.tile(key))
+            painter.translate(-key[0] * self.tile_size, -key[1] * self.tile_size)
+            painter.setPen(pen)
+            painter.drawPath(path)
+            painter.end()
+        return bounds
+
+    def paint_image(self, rect, image, keys=None):
+        # Картинка растягивается на rect (логические координаты), как и кадр снимка
+        for key in self.tile_keys(rect):
+            if keys is not None and key not in keys:
+                continue
+            painter = QPainter(self.tile(key))
+            painter.translate(-key[0] * self.tile_size, -key[1] * self.tile_size)
+            painter.drawImage(QRectF(rect), image)
+            painter.end()
+        return rect
+
+    def draw(self, painter, rect):
+        for key in self.tile_keys(rect):
+            tile = self.tiles.get(key)
+            if tile is not None:
+                painter.drawImage(self.tile_rect(key).topLeft(), tile)
@@ -0,0 +1,97 @@
+from PyQt5.QtCore import QRect
+
+from annotation_layer import TiledLayer
+
+
+class Annotation:
+    def __init__(self, kind, path, pen):
+        self.kind = kind
+        self.path = path
+        self.pen = pen
+
+    def bounds(self, layer):
+        return layer.path_bounds(self.path, self.pen)
+
+    def paint(self, painter):
+        painter.setPen(self.pen)
+        painter.drawPath(self.path)
+
+    def rasterize(self, layer, keys=None):
+        layer.paint_path(self.path, self.pen, keys)
+
+
+class AnnotationModel:
+    """Список аннотаций с undo/redo; растеризуется лениво в кэш из тайлов."""
+
+    def __init__(self):
+        self.items = []
+        self.redo_stack = []
+        self.cache = TiledLayer()
+
+        # items[:rasterized] уже лежат в кэше, остальные ждут отрисовки
+        self.rasterized = 0
+        self.stale_keys = set()
+
+    def clear(self):
+        self.items.clear()
+        self.redo_stack.clear()
+        self.cache.clear()
+        self.rasterized = 0
+        self.stale_keys.clear()
+
+    def add(self, item):
+        self.items.append(item)
+        self.redo_stack.clear()
+        return item.bounds(self.cache)
+
+    def undo(self):
+        if not self.items:
+            return QRect()
+
+        item = self.items.pop()
+        self.redo_stack.append(item)
+        bounds = item.bounds(self.cache)
+        if self.rasterized > len(self.items):
+            # Перерисуем только тайлы, которых касалась отменённая фигура
+            self.rasterized = len(self.items)
+            self.stale_keys.update(self.cache.tile_keys(bounds))
+        return bounds
+
+    def redo(self):
+        if not self.redo_stack:
+            return QRect()
+
+        item = self.redo_stack.pop()
+        self.items.append(item)
+        return item.bounds(self.cache)
+
+    def refresh(self, item):
+        """Фигура изменилась на месте (например, досчитался фильтр) - перерисовать её тайлы."""
+        bounds = item.bounds(self.cache)
+        if item in self.items[:self.rasterized]:
+            self.stale_keys.update(self.cache.tile_keys(bounds))
+        return bounds
+
+    def flush(self):
+        if self.stale_keys:
+            for key in self.stale_keys:
+                self.cache.tiles.pop(key, None)
+            for item in self.items[:self.rasterized]:
+                item.rasterize(self.cache, self.stale_keys)
+            self.stale_keys = set()
+
+        for item in self.items[self.rasterized:]:
+            item.rasterize(self.cache)
+        self.rasterized = len(self.items)
+
+    def draw(self, painter, rect):
+        self.flush()
+        self.cache.draw(painter, rect)
+
+    def render(self, painter, rect, kinds=None):
+        # Для экспорта рисуем векторы напрямую, без растеризации всего кэша
+        for item in self.items:
+            if kinds is not None and item.kind not in kinds:
+                continue
+            if item.bounds(self.cache).intersects(rect):
+                item.paint(painter)
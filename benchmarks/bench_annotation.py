@@ -0,0 +1,85 @@
+"""Стоимость фиксации штриха: копия полноэкранного буфера против тайлового слоя.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_annotation.py [--strokes N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QPixmap, QPainter, QPainterPath, QPen, QColor, QGuiApplication
+
+from annotation_layer import TiledLayer
+
+
+def random_stroke(rng, width, height, points=40):
+    x, y = rng.uniform(0, width), rng.uniform(0, height)
+    path = QPainterPath()
+    path.moveTo(x, y)
+    for _ in range(points):
+        x = min(max(x + rng.uniform(-15, 15), 0), width)
+        y = min(max(y + rng.uniform(-15, 15), 0), height)
+        path.lineTo(x, y)
+    return path
+
+
+class LegacyBuffer:
+    def __init__(self, size):
+        self.size = size
+        self.buffer = QPixmap()
+
+    def paint_path(self, path, pen):
+        if not self.buffer.size().isValid():
+            self.buffer = QPixmap(self.size)
+            self.buffer.fill(Qt.transparent)
+
+        temp = self.buffer.copy()
+        self.buffer = QPixmap(self.size)
+        self.buffer.fill(Qt.transparent)
+
+        painter = QPainter(self.buffer)
+        painter.drawPixmap(0, 0, temp)
+        painter.setPen(pen)
+        painter.drawPath(path)
+        painter.end()
+
+    @property
+    def nbytes(self):
+        # Пиковая память: старая копия и новый буфер одновременно
+        return self.size.width() * self.size.height() * 4 * 2
+
+
+def run(layer, strokes, pen):
+    timings = []
+    for path in strokes:
+        start = time.perf_counter()
+        layer.paint_path(path, pen)
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / len(timings) * 1000, layer.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--strokes', type=int, default=50)
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+
+    rng = random.Random(3)
+    strokes = [random_stroke(rng, args.width, args.height) for _ in range(args.strokes)]
+    pen = QPen(QColor(255, 0, 0), 3)
+
+    print(f"{'layer':<8} {'ms/stroke':>10} {'MB':>8}")
+    for name, layer in [('legacy', LegacyBuffer(QSize(args.width, args.height))), ('tiled', TiledLayer())]:
+        ms, nbytes = run(layer, strokes, pen)
+        print(f'{name:<8} {ms:>10.2f} {nbytes / 2 ** 20:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
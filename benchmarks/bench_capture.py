@@ -0,0 +1,103 @@
+"""Сравнение старого пути захвата (mss -> PIL -> QImage) с обёрткой BGRA-буфера.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_capture.py [--runs N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mss.screenshot import ScreenShot
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QColor, QPainter, QGuiApplication
+
+from capture import CapturedFrame
+
+RESOLUTIONS = {
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+    '5k': (5120, 2880),
+}
+
+
+def fake_grab(width, height):
+    monitor = {'left': 0, 'top': 0, 'width': width, 'height': height}
+    return ScreenShot(bytearray(os.urandom(16)) * (width * height // 4), monitor)
+
+
+def legacy_pipeline(screenshot, crop):
+    from PIL import Image
+
+    copied = 0
+    # make_screenshot
+    rgb = screenshot.rgb
+    copied += len(rgb)
+    pil_image = Image.frombytes('RGB', screenshot.size, rgb)
+    copied += len(rgb)
+    # show_screenshot
+    rgb = screenshot.rgb
+    copied += len(rgb)
+    img = QImage(rgb, screenshot.width, screenshot.height, QImage.Format_RGB888)
+    dark_img = QImage(img.size(), QImage.Format_ARGB32)
+    dark_img.fill(QColor(0, 0, 0, 150))
+    painter = QPainter(dark_img)
+    painter.setOpacity(0.5)
+    painter.drawImage(0, 0, img)
+    painter.end()
+    copied += dark_img.sizeInBytes()
+    # clip_screenshot
+    data = pil_image.tobytes()
+    copied += len(data)
+    full = QImage(data, pil_image.width, pil_image.height, QImage.Format_RGB888)
+    cropped = full.copy(crop)
+    copied += cropped.sizeInBytes()
+    return copied
+
+
+def frame_pipeline(screenshot, crop):
+    copied = 0
+    frame = CapturedFrame.from_mss(screenshot)
+    dark_img = QImage(frame.image.size(), QImage.Format_ARGB32)
+    dark_img.fill(QColor(0, 0, 0, 150))
+    painter = QPainter(dark_img)
+    painter.setOpacity(0.5)
+    painter.drawImage(0, 0, frame.image)
+    painter.end()
+    copied += dark_img.sizeInBytes()
+    cropped = frame.crop(crop)
+    copied += cropped.sizeInBytes()
+    return copied
+
+
+def measure(pipeline, screenshot, crop, runs):
+    timings = []
+    copied = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        copied = pipeline(screenshot, crop)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, copied
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+
+    pipelines = [('legacy', legacy_pipeline), ('frame', frame_pipeline)]
+    print(f"{'resolution':<10} {'pipeline':<8} {'median ms':>10} {'copied MB':>10}")
+    for name, (width, height) in RESOLUTIONS.items():
+        screenshot = fake_grab(width, height)
+        crop = QRect(width // 4, height // 4, width // 2, height // 2)
+        for pipeline_name, pipeline in pipelines:
+            ms, copied = measure(pipeline, screenshot, crop, args.runs)
+            print(f'{name:<10} {pipeline_name:<8} {ms:>10.1f} {copied / 2 ** 20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
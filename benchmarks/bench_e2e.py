@@ -0,0 +1,421 @@
+"""Сквозной бенчмарк: записанная последовательность ввода проигрывается против ScreenshotApp.
+
+Для каждого разрешения запускается отдельный процесс (чтобы пиковый RSS не смешивался),
+кадры отдаёт FakeGrabber. Считаются перцентили задержки по стадиям (захват, показ оверлея,
+выделение, штрих, завершение фигуры, копирование), пиковый RSS и аллокации Python (tracemalloc).
+
+Запуск:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_e2e.py [--resolutions 1080p,4k,3x4k] [--json out.json]
+    python benchmarks/bench_e2e.py --compare before.json after.json
+    python benchmarks/bench_e2e.py --record my_track.json   # живое приложение, запись ввода до выхода
+
+Трек - JSON со списком событий, координаты в долях оверлея:
+    {"type": "key", "key": "f3"}
+    {"type": "tool", "tool": "pencil"}
+    {"type": "press" | "move" | "release", "x": 0.25, "y": 0.4}
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TRACK = os.path.join(BENCH_DIR, 'tracks', 'annotate.json')
+
+RESOLUTIONS = {
+    '1080p': [(1920, 1080)],
+    '4k': [(3840, 2160)],
+    '3x4k': [(3840, 2160)] * 3,
+}
+
+# Метод приложения -> имя стадии в отчёте
+KEY_STAGES = {
+    'make_screenshot': 'capture',
+    'clip_screenshot': 'clip',
+}
+MOVE_STAGES = {
+    'select': 'selection',
+    'pencil': 'stroke',
+    'line': 'shape',
+    'rectangle': 'shape',
+}
+
+
+def synthetic_track(stroke_points=200):
+    """Типичная сессия: выделение, перетаскивание, карандаш, линия, прямоугольник, undo/redo, копирование."""
+    events = [{'type': 'key', 'key': 'f3'}]
+
+    def drag(points):
+        points = list(points)
+        events.append({'type': 'press', 'x': points[0][0], 'y': points[0][1]})
+        for x, y in points[1:]:
+            events.append({'type': 'move', 'x': round(x, 4), 'y': round(y, 4)})
+        events.append({'type': 'release', 'x': round(points[-1][0], 4), 'y': round(points[-1][1], 4)})
+
+    drag((0.2 + 0.4 * i / 60, 0.2 + 0.4 * i / 60) for i in range(61))
+    drag((0.4 + 0.1 * i / 30, 0.4) for i in range(31))
+
+    events.append({'type': 'tool', 'tool': 'pencil'})
+    drag((0.35 + 0.4 * i / stroke_points, 0.5 + 0.1 * math.sin(i / 8)) for i in range(stroke_points + 1))
+    events.append({'type': 'tool', 'tool': 'line'})
+    drag((0.4 + 0.2 * i / 30, 0.45 + 0.1 * i / 30) for i in range(31))
+    events.append({'type': 'tool', 'tool': 'rectangle'})
+    drag((0.5 + 0.15 * i / 30, 0.5 + 0.1 * i / 30) for i in range(31))
+
+    events += [
+        {'type': 'key', 'key': 'ctrl + z'},
+        {'type': 'key', 'key': 'ctrl + y'},
+        {'type': 'key', 'key': 'ctrl + c'},
+    ]
+    return {'name': 'annotate', 'events': events}
+
+
+def save_track(track, path):
+    # По событию на строку, чтобы треки было удобно смотреть в диффе
+    with open(path, 'w') as track_file:
+        track_file.write('{"name": %s, "events": [\n' % json.dumps(track['name']))
+        track_file.write(',\n'.join(json.dumps(event) for event in track['events']))
+        track_file.write('\n]}\n')
+
+
+def load_track(path=None):
+    if path is None:
+        if not os.path.exists(DEFAULT_TRACK):
+            return synthetic_track()
+        path = DEFAULT_TRACK
+    with open(path) as track_file:
+        return json.load(track_file)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def pick(q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+    return {
+        'count': len(samples),
+        'p50_ms': round(pick(0.50), 3),
+        'p90_ms': round(pick(0.90), 3),
+        'p99_ms': round(pick(0.99), 3),
+        'max_ms': round(samples[-1] * 1000, 3),
+        'total_ms': round(sum(samples) * 1000, 3),
+    }
+
+
+def max_rss_mb():
+    # ru_maxrss на Linux в килобайтах, на macOS в байтах
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+class Replayer:
+    """Проигрывает трек против ScreenshotApp и собирает время по стадиям."""
+
+    def __init__(self, app, window):
+        self.app = app
+        self.window = window
+        self.samples = {}
+        self.allocations = {}
+        self.tracing = False
+        window.latency_hook = lambda latency: self.add('overlay', latency / 1000)
+
+    def add(self, stage, seconds):
+        # Проход с tracemalloc медленнее, его время в перцентили не идёт
+        if self.tracing:
+            return
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def point(self, event):
+        from PyQt5.QtCore import QPointF
+
+        return QPointF(event['x'] * self.window.width(), event['y'] * self.window.height())
+
+    def dispatch(self, event):
+        from PyQt5.QtCore import Qt, QEvent
+        from PyQt5.QtGui import QMouseEvent
+
+        from main import HOTKEYS
+
+        kind = event['type']
+        if kind == 'key':
+            # Тем же путём, что и настоящий хоткей: через очередь событий Qt
+            method = HOTKEYS[event['key']]
+            self.window.hotkey_dispatcher.press(method)
+            return KEY_STAGES.get(method, method)
+
+        if kind == 'tool':
+            self.window.change_action(event['tool'])
+            return 'tool'
+
+        qt_kind, handler = {
+            'press': (QEvent.MouseButtonPress, self.window.mousePressEvent),
+            'move': (QEvent.MouseMove, self.window.mouseMoveEvent),
+            'release': (QEvent.MouseButtonRelease, self.window.mouseReleaseEvent),
+        }[kind]
+        buttons = Qt.NoButton if kind == 'release' else Qt.LeftButton
+        handler(QMouseEvent(qt_kind, self.point(event), Qt.LeftButton, buttons, Qt.NoModifier))
+
+        if kind == 'move':
+            return MOVE_STAGES.get(self.window.action, 'move')
+        if kind == 'release' and self.window.action != 'select':
+            return 'finalize'
+        return kind
+
+    def replay(self, track, trace_allocations=False):
+        self.tracing = trace_allocations
+        for event in track['events']:
+            if trace_allocations:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+
+            # Обработчик плюс перерисовка, которую он запросил
+            start = time.perf_counter()
+            stage = self.dispatch(event)
+            self.app.processEvents()
+            if stage == 'capture':
+                # Снимок идёт в рабочем потоке, стадия длится до открытия оверлея
+                self.window.capture_worker.wait()
+                self.app.processEvents()
+            elapsed = time.perf_counter() - start
+
+            self.add(stage, elapsed)
+            if trace_allocations:
+                peak = tracemalloc.get_traced_memory()[1] - before
+                self.allocations[stage] = max(self.allocations.get(stage, 0), peak)
+
+            if stage == 'clip':
+                # Кодирование и запись в буфер идут в рабочем потоке, ждём очередь
+                start = time.perf_counter()
+                self.window.output.executor.submit(lambda: None).result()
+                self.add('clip_flush', time.perf_counter() - start)
+        self.tracing = False
+
+
+def run_worker(resolution, track_path, repeat, trace_allocations):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    from capture import monitor_rect
+    from grabbers import FakeGrabber
+    from main import ScreenshotApp
+
+    startup_rss = max_rss_mb()
+    grabber = FakeGrabber(RESOLUTIONS[resolution], pattern='noise')
+    window = ScreenshotApp(grabber_factory=lambda: grabber, clipboard='memory', hotkeys=False)
+    # Экран offscreen-платформы один и маленький, поэтому раскладку берём прямо из мониторов
+    window.capture._layout = [(monitor, monitor_rect(monitor)) for monitor in grabber.monitors[1:]]
+    window.prewarm()
+
+    track = load_track(track_path)
+    replayer = Replayer(app, window)
+    for _ in range(repeat):
+        replayer.replay(track)
+
+    if trace_allocations:
+        tracemalloc.start()
+        replayer.replay(track, trace_allocations=True)
+        tracemalloc.stop()
+
+    window.output.shutdown()
+    return {
+        'resolution': resolution,
+        'monitors': RESOLUTIONS[resolution],
+        'track': track.get('name', 'unnamed'),
+        'repeat': repeat,
+        'stages': {stage: percentiles(samples) for stage, samples in sorted(replayer.samples.items())},
+        'python_alloc_peak_kb': {stage: round(size / 1024, 1) for stage, size in sorted(replayer.allocations.items())},
+        'startup_rss_mb': startup_rss,
+        'peak_rss_mb': max_rss_mb(),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BENCH_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_all(args):
+    results = []
+    for resolution in args.resolutions.split(','):
+        command = [
+            sys.executable, os.path.abspath(__file__), '--worker', resolution,
+            '--repeat', str(args.repeat),
+        ]
+        if args.track:
+            command += ['--track', args.track]
+        if not args.allocations:
+            command.append('--no-allocations')
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def print_report(report):
+    for result in report['results']:
+        print(f"\n{result['resolution']}  peak RSS {result['peak_rss_mb']} MB (после старта {result['startup_rss_mb']} MB)")
+        print(f"{'stage':<18} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'alloc KB':>10}")
+        for stage, stats in result['stages'].items():
+            alloc = result['python_alloc_peak_kb'].get(stage, '')
+            print(f"{stage:<18} {stats['count']:>5} {stats['p50_ms']:>9.2f} {stats['p90_ms']:>9.2f} {stats['p99_ms']:>9.2f} {alloc:>10}")
+
+
+def compare(before_path, after_path):
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+
+    previous = {result['resolution']: result for result in before['results']}
+    print(f"{before.get('revision')} -> {after.get('revision')}")
+    for result in after['results']:
+        old = previous.get(result['resolution'])
+        if not old:
+            continue
+        print(f"\n{result['resolution']}  peak RSS {old['peak_rss_mb']} -> {result['peak_rss_mb']} MB")
+        print(f"{'stage':<18} {'p50 before':>11} {'p50 after':>10} {'change':>8}")
+        for stage, stats in result['stages'].items():
+            if stage not in old['stages']:
+                continue
+            was, now = old['stages'][stage]['p50_ms'], stats['p50_ms']
+            change = f'{(now - was) / was * 100:+.0f}%' if was else ''
+            print(f'{stage:<18} {was:>11.2f} {now:>10.2f} {change:>8}')
+
+
+class InputRecorder:
+    """Пишет мышь оверлея, смену инструмента и хоткеи живого приложения в трек."""
+
+    def __init__(self, window):
+        from PyQt5.QtCore import QObject
+
+        from main import HOTKEYS
+
+        self.window = window
+        self.events = []
+
+        recorder = self
+
+        class Filter(QObject):
+            def eventFilter(self, obj, event):
+                recorder.on_event(event)
+                return False
+
+        self.filter = Filter()
+        window.installEventFilter(self.filter)
+
+        for hotkey, method in HOTKEYS.items():
+            setattr(window, method, self.wrap(getattr(window, method), {'type': 'key', 'key': hotkey}))
+        window.change_action = self.wrap_action(window.change_action)
+
+    def wrap(self, function, event):
+        def wrapper(*args):
+            self.events.append(dict(event))
+            return function(*args)
+
+        return wrapper
+
+    def wrap_action(self, function):
+        def wrapper(action):
+            self.events.append({'type': 'tool', 'tool': action})
+            return function(action)
+
+        return wrapper
+
+    def on_event(self, event):
+        from PyQt5.QtCore import QEvent
+
+        kind = {
+            QEvent.MouseButtonPress: 'press',
+            QEvent.MouseMove: 'move',
+            QEvent.MouseButtonRelease: 'release',
+        }.get(event.type())
+        if kind is None or not self.window.width() or not self.window.height():
+            return
+        pos = event.pos()
+        self.events.append({
+            'type': kind,
+            'x': round(pos.x() / self.window.width(), 4),
+            'y': round(pos.y() / self.window.height(), 4),
+        })
+
+    def save(self, path):
+        save_track({'name': os.path.splitext(os.path.basename(path))[0], 'events': self.events}, path)
+
+
+def record(path):
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1])
+    app.setQuitOnLastWindowClosed(False)
+
+    from main import ScreenshotApp
+
+    window = ScreenshotApp(hotkeys=False)
+    recorder = InputRecorder(window)
+    # Хоткеи регистрируем после обёртки методов, иначе нажатия не попадут в трек
+    window.register_hotkeys()
+    app.aboutToQuit.connect(lambda: recorder.save(path))
+    print('Запись идёт, Ctrl+C в терминале - сохранить и выйти', file=sys.stderr)
+    try:
+        app.exec_()
+    except KeyboardInterrupt:
+        pass
+    recorder.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resolutions', default=','.join(RESOLUTIONS))
+    parser.add_argument('--track', help='JSON-трек (по умолчанию tracks/annotate.json)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-allocations', dest='allocations', action='store_false')
+    parser.add_argument('--json', help='записать результат в файл')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    parser.add_argument('--record', metavar='PATH')
+    parser.add_argument('--write-track', metavar='PATH', help='сохранить синтетический трек')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.record:
+        record(args.record)
+        return
+    if args.write_track:
+        save_track(synthetic_track(), args.write_track)
+        return
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.track, args.repeat, args.allocations)))
+        return
+
+    report = run_all(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Время и размер кодирования вырезанного скриншота для каждого пресета.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_encode.py [--image FILE]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtGui import QImage, QGuiApplication
+
+from encoder import PRESETS, EncodeService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image', default=os.path.join(ROOT, 'all_monitors_screenshot.png'))
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+
+    image = QImage(args.image).convertToFormat(QImage.Format_RGB32)
+    service = EncodeService()
+
+    print(f'{image.width()}x{image.height()}')
+    print(f"{'preset':<14} {'ms':>8} {'KB':>8}")
+    futures = {name: service.submit(image, preset) for name, preset in PRESETS.items()}
+    for name, future in futures.items():
+        result = future.result()
+        print(f'{name:<14} {result.seconds * 1000:>8.1f} {result.size / 1024:>8.1f}')
+    service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Хоткеи из чужого потока: задержка по стадиям от нажатия до оверлея и схлопывание повторных F3.
+
+Отдельный поток играет роль keyboard: шлёт пачку F3 подряд, ждёт оверлей, закрывает его Esc.
+Пока он это делает, цикл событий Qt занят своим (имитируется таймером с работой в GUI-потоке).
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_hotkeys.py [--rounds N] [--burst K] [--busy-ms M]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from capture import monitor_rect
+from grabbers import FakeGrabber
+from instrumentation import tracer
+
+STAGES = ['hotkey_queue', 'make_screenshot', 'grab_all', 'capture_deliver', 'on_captured', 'overlay_latency']
+
+
+def keyboard_thread(window, shown, rounds, burst, finished):
+    dispatcher = window.hotkey_dispatcher
+    for _ in range(rounds):
+        shown.clear()
+        for _ in range(burst):
+            dispatcher.press('make_screenshot')
+        if not shown.wait(5):
+            print('оверлей не показан за 5 с', file=sys.stderr)
+            break
+        dispatcher.press('close_screenshot')
+        time.sleep(0.02)
+    finished.set()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--burst', type=int, default=3, help='сколько F3 подряд за одно нажатие')
+    parser.add_argument('--busy-ms', type=float, default=5.0, help='работа в GUI-потоке каждые 10 мс')
+    parser.add_argument('--size', default='3840x2160')
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from main import ScreenshotApp
+
+    width, height = map(int, args.size.split('x'))
+    grabber = FakeGrabber([(width, height)], pattern='noise', ns_per_pixel=2)
+    window = ScreenshotApp(grabber_factory=lambda: grabber, clipboard='memory', hotkeys=False)
+    window.capture._layout = [(monitor, monitor_rect(monitor)) for monitor in grabber.monitors[1:]]
+    window.prewarm()
+
+    shown = threading.Event()
+    window.latency_hook = lambda latency: shown.set()
+
+    # Занятый цикл событий: хоткей ждёт в очереди, пока GUI-поток не освободится
+    busy = QTimer()
+    busy.timeout.connect(lambda: time.sleep(args.busy_ms / 1000))
+    busy.start(10)
+
+    finished = threading.Event()
+    tracer.enable()
+    thread = threading.Thread(target=keyboard_thread, args=(window, shown, args.rounds, args.burst, finished))
+    thread.start()
+    while not finished.is_set():
+        app.processEvents()
+        time.sleep(0.001)
+    thread.join()
+    app.processEvents()
+
+    summary = tracer.summary()
+    tracer.disable()
+    window.output.shutdown()
+    window.capture_worker.shutdown()
+
+    print(f"{'stage':<18} {'n':>5} {'avg ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name in STAGES:
+        stats = summary['stages'].get(name)
+        if stats:
+            print(f"{name:<18} {stats['count']:>5} {stats['avg_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['max_ms']:>8.2f}")
+    print(f"\nнажатий F3: {args.rounds * args.burst}, снимков: {summary['stages'].get('on_captured', {}).get('count', 0)}, "
+          f"схлопнуто: {summary['counters'].get('coalesced_captures', 0)}")
+
+
+if __name__ == '__main__':
+    main()
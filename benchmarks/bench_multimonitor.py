@@ -0,0 +1,66 @@
+"""Захват трёх 4K-мониторов: один снимок monitors[0] против параллельных снимков по мониторам.
+
+Мониторы стоят со сдвигом по высоте, поэтому monitors[0] (описывающий прямоугольник)
+содержит пустые полосы, которые per-monitor снимок не хранит.
+
+Источник - FakeGrabber: стоимость снимка моделируется задержкой на пиксель (настоящий mss
+отпускает GIL в ctypes-вызовах) плюс копией буфера, поэтому бенчмарк работает без дисплея.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_multimonitor.py [--ns-per-pixel N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtGui import QGuiApplication
+
+from capture import CaptureSession
+from grabbers import FakeGrabber
+
+# Три 4K-монитора со смещением по вертикали, как часто стоят на столе
+RECTS = [
+    (0, 0, 3840, 2160),
+    (3840, 400, 3840, 2160),
+    (7680, -300, 3840, 2160),
+]
+
+
+def naive(session):
+    grabber = session.grabber()
+    return grabber.grab(grabber.monitors[0])
+
+
+def per_monitor(session):
+    return session.grab_all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--ns-per-pixel', type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+    # Один общий источник на все потоки: рабочий стол строится один раз
+    grabber = FakeGrabber(rects=RECTS, ns_per_pixel=args.ns_per_pixel)
+    session = CaptureSession(lambda: grabber)
+
+    print(f"{'mode':<12} {'median ms':>10} {'MB':>8}")
+    for name, grab in [('monitors[0]', naive), ('per-monitor', per_monitor)]:
+        timings = []
+        nbytes = 0
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            capture = grab(session)
+            timings.append(time.perf_counter() - start)
+            nbytes = capture.nbytes
+            del capture
+        timings.sort()
+        print(f'{name:<12} {timings[len(timings) // 2] * 1000:>10.1f} {nbytes / 2 ** 20:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Задержка от кадра до первой отрисовки оверлея: затемнённая копия против затемнения при отрисовке.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_overlay.py [--runs N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QColor, QPainter, QPixmap
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from capture import CapturedFrame
+from main_canvas import ScreenShotCanvas
+
+RESOLUTIONS = {
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+
+class FixedSelection:
+    def __init__(self, rect):
+        self.rect = rect
+
+    def get_selection(self):
+        return self.rect
+
+
+def legacy_overlay(label, frame, target):
+    dark_img = QImage(frame.image.size(), QImage.Format_ARGB32)
+    dark_img.fill(QColor(0, 0, 0, 150))
+    painter = QPainter(dark_img)
+    painter.setOpacity(0.5)
+    painter.drawImage(0, 0, frame.image)
+    painter.end()
+    label.setPixmap(QPixmap.fromImage(dark_img))
+    label.render(target)
+    return dark_img.sizeInBytes()
+
+
+def canvas_overlay(canvas, frame, target):
+    canvas.set_frame(frame)
+    canvas.render(target)
+    return 0
+
+
+def measure(overlay, widget, frame, target, runs):
+    timings = []
+    extra = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        extra = overlay(widget, frame, target)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, extra
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    print(f"{'resolution':<10} {'overlay':<8} {'median ms':>10} {'dim buf MB':>10}")
+    for name, (width, height) in RESOLUTIONS.items():
+        frame = CapturedFrame(bytearray(width * height * 4), width, height)
+        target = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+
+        label = QLabel()
+        label.resize(width, height)
+        canvas = ScreenShotCanvas()
+        canvas.resize(width, height)
+        canvas.tools_panel.hide()
+        canvas.selection_source = FixedSelection(QRect(width // 4, height // 4, width // 2, height // 2))
+
+        for overlay_name, overlay, widget in [('legacy', legacy_overlay, label), ('canvas', canvas_overlay, canvas)]:
+            ms, extra = measure(overlay, widget, frame, target, args.runs)
+            print(f'{name:<10} {overlay_name:<8} {ms:>10.1f} {extra / 2 ** 20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
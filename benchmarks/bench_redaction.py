@@ -0,0 +1,57 @@
+"""Пикселизация и размытие: стоимость превью (прореженная выборка) и полного расчёта по размеру области.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_redaction.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QGuiApplication
+
+from capture import CapturedFrame, DesktopCapture
+from redaction import BLUR_RADIUS, PIXELATE_BLOCK, PREVIEW_PIXELS, redact
+
+SCREEN = (3840, 2160)
+REGIONS = {
+    'поле ввода': QRect(100, 100, 400, 40),
+    'окно': QRect(200, 200, 1200, 800),
+    'полэкрана': QRect(0, 0, 1920, 2160),
+    'весь экран': QRect(0, 0, 3840, 2160),
+}
+STRENGTH = {'pixelate': PIXELATE_BLOCK, 'blur': BLUR_RADIUS}
+
+
+def best_ms(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+    width, height = SCREEN
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 4), dtype=np.uint8)
+    capture = DesktopCapture([CapturedFrame(bytearray(pixels.tobytes()), width, height)])
+
+    print(f"{'область':<12} {'фильтр':<9} {'превью ms':>10} {'полный ms':>10}")
+    for name, rect in REGIONS.items():
+        for kind, strength in STRENGTH.items():
+            preview = best_ms(lambda: redact(capture, rect, kind, strength, PREVIEW_PIXELS), args.repeat)
+            full = best_ms(lambda: redact(capture, rect, kind, strength), args.repeat)
+            print(f'{name:<12} {kind:<9} {preview:>10.1f} {full:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Время кадра при перетаскивании выделения и рисовании штриха: полная перерисовка против грязных областей.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_repaint.py [--width W --height H]
+"""
+import argparse
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt, QEvent, QPointF, QRect
+from PyQt5.QtGui import QMouseEvent, QPainterPath, QPen, QColor
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from capture import CapturedFrame
+from main_canvas import ScreenShotCanvas
+from rectangle_drawer import RectangleDrawer
+
+
+def mouse_event(kind, x, y):
+    buttons = Qt.NoButton if kind == QEvent.MouseButtonRelease else Qt.LeftButton
+    return QMouseEvent(kind, QPointF(x, y), Qt.LeftButton, buttons, Qt.NoModifier)
+
+
+def selection_track(width, height, steps):
+    yield mouse_event(QEvent.MouseButtonPress, width * 0.2, height * 0.2)
+    for i in range(steps):
+        t = i / steps
+        yield mouse_event(QEvent.MouseMove, width * (0.2 + 0.3 * t), height * (0.2 + 0.3 * t))
+    yield mouse_event(QEvent.MouseButtonRelease, width * 0.5, height * 0.5)
+    # Перетаскиваем готовое выделение
+    yield mouse_event(QEvent.MouseButtonPress, width * 0.35, height * 0.35)
+    for i in range(steps):
+        t = i / steps
+        yield mouse_event(QEvent.MouseMove, width * (0.35 + 0.1 * t), height * 0.35)
+    yield mouse_event(QEvent.MouseButtonRelease, width * 0.45, height * 0.35)
+
+
+def stroke_track(width, height, steps):
+    for i in range(steps):
+        t = i / steps
+        yield width * (0.1 + 0.8 * t), height * (0.5 + 0.2 * math.sin(t * 20))
+
+
+def replay(app, canvas, width, height, steps, full_repaint):
+    if full_repaint:
+        canvas.update = lambda *args: QLabel.update(canvas)
+
+    drawer = RectangleDrawer(canvas)
+    canvas.selection_source = drawer
+    path = QPainterPath()
+    pen = QPen(QColor(255, 0, 0), 3)
+
+    def paint_layer(painter, rect):
+        drawer.paint(painter)
+        painter.setPen(pen)
+        painter.drawPath(path)
+
+    canvas.layers = [paint_layer]
+    app.processEvents()
+    canvas.frame_counter.reset()
+
+    for event in selection_track(width, height, steps):
+        match event.type():
+            case QEvent.MouseButtonPress:
+                drawer.mouse_press(event)
+            case QEvent.MouseMove:
+                drawer.mouse_move(event)
+            case QEvent.MouseButtonRelease:
+                drawer.mouse_release(event)
+        app.processEvents()
+
+    last = None
+    for x, y in stroke_track(width, height, steps):
+        if last is None:
+            path.moveTo(x, y)
+        else:
+            path.lineTo(x, y)
+            segment = QRect(int(last[0]), int(last[1]), int(x - last[0]), int(y - last[1])).normalized()
+            canvas.update(segment.adjusted(-5, -5, 5, 5))
+        last = (x, y)
+        app.processEvents()
+
+    if full_repaint:
+        del canvas.update
+    return canvas.frame_counter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    frame = CapturedFrame(bytearray(args.width * args.height * 4), args.width, args.height)
+    canvas = ScreenShotCanvas()
+    canvas.tools_panel.hide()
+    canvas.setGeometry(0, 0, args.width, args.height)
+    canvas.set_frame(frame)
+    canvas.show()
+
+    print(f"{'mode':<8} {'frames':>7} {'avg ms':>8} {'Mpx painted':>12}")
+    for mode, full_repaint in [('full', True), ('damage', False)]:
+        counter = replay(app, canvas, args.width, args.height, args.steps, full_repaint)
+        print(f'{mode:<8} {counter.frames:>7} {counter.average_ms():>8.2f} {counter.pixels / 1e6:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
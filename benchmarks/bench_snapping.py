@@ -0,0 +1,80 @@
+"""Прилипание к краям: время построения индекса краёв в фоне и стоимость поиска на движение мыши.
+
+Снимок - синтетический рабочий стол с окнами-прямоугольниками поверх шума.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_snapping.py [--lookups N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt5.QtCore import QPoint, QRect
+from PyQt5.QtGui import QGuiApplication
+
+from capture import CapturedFrame, DesktopCapture
+from snapping import EdgeIndex
+
+RESOLUTIONS = {
+    '1080p': [(1920, 1080)],
+    '4k': [(3840, 2160)],
+    '3x4k': [(3840, 2160)] * 3,
+}
+
+
+def desktop(sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    left = 0
+    for width, height in sizes:
+        pixels = rng.integers(200, 216, (height, width, 4), dtype=np.uint8)
+        for _ in range(20):
+            x, y = rng.integers(0, width - 200), rng.integers(0, height - 200)
+            w, h = rng.integers(100, width // 3), rng.integers(100, height // 3)
+            pixels[y:y + h, x:x + w, :3] = rng.integers(0, 180)
+        frame = CapturedFrame(bytearray(pixels.tobytes()), width, height, left, 0)
+        frame.set_geometry(QRect(left, 0, width, height))
+        frames.append(frame)
+        left += width
+    return DesktopCapture(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+    rng = np.random.default_rng(1)
+
+    print(f"{'desktop':<8} {'step':>5} {'build ms':>9} {'index MB':>9} {'snap us':>8} {'region us':>10}")
+    for name, sizes in RESOLUTIONS.items():
+        capture = desktop(sizes)
+        start = time.perf_counter()
+        index = EdgeIndex.from_capture(capture)
+        build = time.perf_counter() - start
+        nbytes = sum(array.nbytes for array in vars(index).values() if isinstance(array, np.ndarray))
+
+        size = capture.rect().size()
+        points = [QPoint(int(x), int(y)) for x, y in zip(
+            rng.integers(0, size.width(), args.lookups), rng.integers(0, size.height(), args.lookups))]
+
+        start = time.perf_counter()
+        for point in points:
+            index.snap_x(point.x(), point.y() - 300, point.y(), 8)
+            index.snap_y(point.y(), point.x() - 400, point.x(), 8)
+        snap = (time.perf_counter() - start) / len(points)
+
+        start = time.perf_counter()
+        for point in points:
+            index.region_at(point)
+        region = (time.perf_counter() - start) / len(points)
+
+        print(f'{name:<8} {index.step:>5} {build * 1000:>9.1f} {nbytes / 2 ** 20:>9.1f} {snap * 1e6:>8.1f} {region * 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
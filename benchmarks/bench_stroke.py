@@ -0,0 +1,100 @@
+"""Стоимость кадра при рисовании длинного штриха карандашом: весь QPainterPath против отрезков в слое.
+
+Трек - JSON-список точек [[x, y], ...], записанный с мыши; без --track генерируется
+синтетический трек с частотой опроса 1000 Гц.
+
+Запуск: QT_QPA_PLATFORM=offscreen python benchmarks/bench_stroke.py [--track FILE]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QPointF, QRect
+from PyQt5.QtGui import QImage, QPainter, QPainterPath, QPen, QColor, QGuiApplication
+
+from annotation_layer import TiledLayer
+from stroke import StrokeBuilder
+
+
+def synthetic_track(seconds=5, rate=1000, width=3840, height=2160):
+    points = []
+    for i in range(seconds * rate):
+        t = i / rate
+        x = width / 2 + math.sin(t * 1.3) * width * 0.4 + math.sin(t * 17) * 40
+        y = height / 2 + math.cos(t * 0.9) * height * 0.4 + math.cos(t * 23) * 40
+        points.append([round(x), round(y)])
+    return points
+
+
+def legacy_frames(track, target, pen):
+    path = QPainterPath(QPointF(*track[0]))
+    timings = []
+    last = track[0]
+    for x, y in track[1:]:
+        start = time.perf_counter()
+        path.lineTo(x, y)
+        damage = QRect(last[0], last[1], x - last[0], y - last[1]).normalized().adjusted(-5, -5, 5, 5)
+        painter = QPainter(target)
+        painter.setClipRect(damage)
+        painter.setPen(pen)
+        painter.drawPath(path)
+        painter.end()
+        timings.append(time.perf_counter() - start)
+        last = (x, y)
+    return timings, path.elementCount()
+
+
+def layer_frames(track, target, pen):
+    stroke = StrokeBuilder(QPointF(*track[0]))
+    layer = TiledLayer()
+    timings = []
+    for x, y in track[1:]:
+        start = time.perf_counter()
+        segment = stroke.add(QPointF(x, y))
+        if segment:
+            segment_path = QPainterPath(segment[0])
+            segment_path.lineTo(segment[1])
+            damage = layer.paint_path(segment_path, pen)
+            painter = QPainter(target)
+            painter.setClipRect(damage)
+            layer.draw(painter, damage)
+            painter.end()
+        timings.append(time.perf_counter() - start)
+    return timings, stroke.path(smooth=True).elementCount()
+
+
+def window_ms(timings, start, size=500):
+    window = timings[start:start + size]
+    return sum(window) / len(window) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--track', help='JSON file with recorded [[x, y], ...] points')
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+
+    if args.track:
+        with open(args.track) as track_file:
+            track = json.load(track_file)
+    else:
+        track = synthetic_track()
+
+    target = QImage(3840, 2160, QImage.Format_ARGB32_Premultiplied)
+    pen = QPen(QColor(255, 0, 0), 3)
+
+    print(f'{len(track)} points')
+    print(f"{'mode':<8} {'first ms':>9} {'last ms':>9} {'elements':>9}")
+    for name, frames in [('legacy', legacy_frames), ('layer', layer_frames)]:
+        timings, elements = frames(track, target, pen)
+        print(f'{name:<8} {window_ms(timings, 0):>9.3f} {window_ms(timings, len(timings) - 500):>9.3f} {elements:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PyQt5.QtCore import QObject, QRect, QRectF, QPoint, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QGuiApplication
+
+from instrumentation import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class CapturedFrame:
+    """Кадр экрана: сырой BGRA-буфер mss и QImage, который смотрит в него без копирования."""
+
+    def __init__(self, raw, width, height, left=0, top=0):
+        # QImage не владеет памятью, поэтому буфер держим, пока жив кадр
+        self._raw = raw
+        self.width = width
+        self.height = height
+        self.left = left
+        self.top = top
+        self.image = QImage(self._raw, width, height, width * 4, QImage.Format_RGB32)
+
+        # Место кадра в логических координатах оверлея, scale - физических пикселей на логический
+        self.geometry = QRect(0, 0, width, height)
+        self.scale = 1.0
+
+    @classmethod
+    def from_mss(cls, screenshot):
+        return cls(
+            screenshot.raw,
+            screenshot.width,
+            screenshot.height,
+            screenshot.left,
+            screenshot.top,
+        )
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def nbytes(self):
+        return len(self._raw)
+
+    def set_geometry(self, geometry):
+        self.geometry = QRect(geometry)
+        self.scale = self.width / geometry.width() if geometry.width() else 1.0
+        self.image.setDevicePixelRatio(self.scale)
+
+    def rect(self):
+        return QRect(self.geometry)
+
+    def source_rect(self, rect):
+        return QRectF(
+            (rect.x() - self.geometry.x()) * self.scale,
+            (rect.y() - self.geometry.y()) * self.scale,
+            rect.width() * self.scale,
+            rect.height() * self.scale,
+        )
+
+    def draw(self, painter, rect):
+        target = rect.intersected(self.geometry)
+        if not target.isEmpty():
+            painter.drawImage(QRectF(target), self.image, self.source_rect(target))
+
+    def monitor_region(self, rect):
+        # Область в физических координатах экрана, как её ждёт Grabber.grab
+        source = self.source_rect(rect.intersected(self.geometry)).toAlignedRect()
+        return {
+            'left': self.left + source.x(),
+            'top': self.top + source.y(),
+            'width': source.width(),
+            'height': source.height(),
+        }
+
+    def crop(self, rect):
+        # Единственная копия пикселей - только выделенная область
+        rect = rect.intersected(self.geometry)
+        image = self.image.copy(self.source_rect(rect).toAlignedRect())
+        image.setDevicePixelRatio(self.scale)
+        return image
+
+
+class DesktopCapture:
+    """Снимок всех мониторов: по кадру на экран, общий кадр рабочего стола не собирается."""
+
+    def __init__(self, frames):
+        bounds = QRect()
+        for frame in frames:
+            bounds = bounds.united(frame.geometry)
+
+        # Глобальная геометрия оверлея; кадры переводим в его координаты
+        self.geometry = bounds
+        self.frames = frames
+        for frame in frames:
+            frame.set_geometry(frame.geometry.translated(-bounds.topLeft()))
+
+    @property
+    def nbytes(self):
+        return sum(frame.nbytes for frame in self.frames)
+
+    def rect(self):
+        return QRect(QPoint(0, 0), self.geometry.size())
+
+    def intersecting(self, rect):
+        return [frame for frame in self.frames if frame.geometry.intersects(rect)]
+
+    def frame_at(self, pos):
+        for frame in self.frames:
+            if frame.geometry.contains(pos):
+                return frame
+        return None
+
+    def monitor_region(self, rect):
+        # Запись и прокрутка идут в пределах одного монитора - того, где центр выделения
+        rect = rect.normalized()
+        frame = self.frame_at(rect.center()) or next(iter(self.intersecting(rect)), None)
+        return frame.monitor_region(rect) if frame else None
+
+    def draw(self, painter, rect):
+        for frame in self.intersecting(rect):
+            frame.draw(painter, rect)
+
+    def crop(self, rect):
+        rect = rect.normalized().intersected(self.rect())
+        frames = self.intersecting(rect)
+        if len(frames) == 1 and frames[0].geometry.contains(rect):
+            return frames[0].crop(rect)
+
+        # Выделение на стыке мониторов: читаем только задетые экраны
+        scale = max((frame.scale for frame in frames), default=1.0)
+        image = QImage(round(rect.width() * scale), round(rect.height() * scale), QImage.Format_RGB32)
+        image.setDevicePixelRatio(scale)
+        image.fill(0)
+        painter = QPainter(image)
+        painter.translate(-rect.topLeft())
+        for frame in frames:
+            frame.draw(painter, rect)
+        painter.end()
+        return image
+
+
+def monitor_rect(monitor):
+    return QRect(monitor['left'], monitor['top'], monitor['width'], monitor['height'])
+
+
+def match_screens(monitors, screens):
+    """Сопоставляет мониторы mss (физические пиксели) с экранами Qt (логические координаты)."""
+    if len(monitors) != len(screens):
+        return [(monitor, monitor_rect(monitor)) for monitor in monitors]
+
+    monitors = sorted(monitors, key=lambda monitor: (monitor['left'], monitor['top']))
+    screens = sorted(screens, key=lambda screen: (screen.geometry().x(), screen.geometry().y()))
+    return [(monitor, screen.geometry()) for monitor, screen in zip(monitors, screens)]
+
+
+class CaptureSession:
+    """Тёплый захват: источник кадров и раскладка мониторов живут между нажатиями F3."""
+
+    def __init__(self, grabber_factory=None):
+        if grabber_factory is None:
+            from grabbers import MssGrabber
+
+            grabber_factory = MssGrabber
+        self.grabber_factory = grabber_factory
+
+        # Дескриптор mss нельзя делить между потоками, поэтому источник свой у каждого потока
+        self._local = threading.local()
+        self._generation = 0
+        self._monitors = None
+        self._layout = None
+        self.executor = ThreadPoolExecutor(thread_name_prefix='grab')
+
+    def grabber(self):
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            if getattr(local, 'grabber', None) is not None:
+                local.grabber.close()
+            local.grabber = self.grabber_factory()
+            local.generation = self._generation
+        return local.grabber
+
+    def monitors(self):
+        if self._monitors is None:
+            self._monitors = self.grabber().monitors
+        return self._monitors
+
+    def layout(self):
+        if self._layout is None:
+            self._layout = match_screens(self.monitors()[1:], QGuiApplication.screens())
+        return self._layout
+
+    def geometry(self):
+        bounds = QRect()
+        for _, geometry in self.layout():
+            bounds = bounds.united(geometry)
+        return bounds
+
+    def invalidate(self):
+        # Вызывается при смене конфигурации экранов
+        self._monitors = None
+        self._layout = None
+        self._generation += 1
+
+    def grab(self, index=1):
+        return self.grab_monitor(self.monitors()[index])
+
+    def grab_monitor(self, monitor):
+        return self.grabber().grab(monitor)
+
+    def grab_all(self, layout=None):
+        # Каждый монитор снимается в своём потоке со своим источником
+        layout = self.layout() if layout is None else layout
+        futures = [self.executor.submit(self.grab_monitor, monitor) for monitor, _ in layout]
+        frames = []
+        for future, (_, geometry) in zip(futures, layout):
+            frame = future.result()
+            frame.set_geometry(geometry)
+            frames.append(frame)
+        return DesktopCapture(frames)
+
+
+class CaptureWorker(QObject):
+    """Снимает рабочий стол в своём потоке и отдаёт снимок сигналом captured в поток Qt.
+
+    Одновременно идёт не больше одного снимка; результат отменённого запроса выбрасывается.
+    """
+
+    captured = pyqtSignal(object, float)
+    failed = pyqtSignal(str)
+    # Снимок готов, испускается из рабочего потока
+    grabbed = pyqtSignal(object, float)
+
+    def __init__(self, session, parent=None):
+        super().__init__(parent)
+        self.session = session
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='capture')
+        self.future = None
+        self.started = None
+        self.grabbed.connect(self.finish)
+
+    @property
+    def busy(self):
+        return self.future is not None
+
+    def request(self, started):
+        if self.future is not None:
+            return False
+        # Раскладка экранов читается из Qt, поэтому здесь, в потоке GUI
+        layout = self.session.layout()
+        self.started = started
+        future = self.future = self.executor.submit(self.grab, layout)
+        future.add_done_callback(lambda done: self.grabbed.emit(done, started))
+        return True
+
+    def grab(self, layout):
+        with tracer.span('grab_all'):
+            capture = self.session.grab_all(layout)
+        return capture, time.perf_counter()
+
+    def finish(self, future, started):
+        if future is not self.future:
+            # Запрос отменён или уже отдан через wait()
+            return
+        self.future = None
+        if future.cancelled():
+            return
+        try:
+            capture, grabbed = future.result()
+        except Exception as error:
+            logger.exception('Не удалось снять экран')
+            self.failed.emit(str(error))
+            return
+        tracer.record('capture_deliver', grabbed, time.perf_counter() - grabbed)
+        self.captured.emit(capture, started)
+
+    def wait(self):
+        """Дожидается текущего снимка и отдаёт его сразу, не через очередь событий."""
+        future = self.future
+        if future is not None:
+            wait([future])
+            self.finish(future, self.started)
+
+    def cancel(self):
+        # Сначала забываем future: cancel() сразу вызывает колбэк, и finish должен его пропустить
+        future, self.future = self.future, None
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
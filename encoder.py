@@ -0,0 +1,112 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QBuffer, QByteArray
+from PyQt5.QtGui import QImageWriter
+
+logger = logging.getLogger(__name__)
+
+
+class EncodePreset:
+    def __init__(self, image_format='PNG', compression=6, quality=-1):
+        self.image_format = image_format.upper()
+        # compression - уровень zlib для PNG (0-9), quality - для JPEG/WebP (0-100)
+        self.compression = compression
+        self.quality = quality
+
+    @property
+    def extension(self):
+        return {'PNG': '.png', 'JPEG': '.jpg', 'WEBP': '.webp'}.get(self.image_format, '.' + self.image_format.lower())
+
+    @classmethod
+    def from_settings(cls, config):
+        image_format = config.image_format.upper()
+        if image_format == 'PNG':
+            return cls('PNG', compression=config.png_compression)
+        if image_format == 'JPEG':
+            return cls('JPEG', quality=config.jpeg_quality)
+        if image_format == 'WEBP':
+            return cls('WEBP', quality=100)
+        raise ValueError(f'Неизвестный формат изображения: {config.image_format}')
+
+
+PRESETS = {
+    'png_fast': EncodePreset('PNG', compression=1),
+    'png': EncodePreset('PNG', compression=6),
+    'png_small': EncodePreset('PNG', compression=9),
+    'jpeg_high': EncodePreset('JPEG', quality=95),
+    'jpeg': EncodePreset('JPEG', quality=85),
+    'jpeg_small': EncodePreset('JPEG', quality=60),
+    # Плагин WebP в Qt при quality=100 пишет без потерь
+    'webp_lossless': EncodePreset('WEBP', quality=100),
+}
+
+
+class EncodeResult:
+    def __init__(self, data, preset, seconds):
+        self.data = data
+        self.preset = preset
+        self.seconds = seconds
+
+    @property
+    def size(self):
+        return len(self.data)
+
+
+def encode(image, preset=PRESETS['png']):
+    start = time.perf_counter()
+
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QBuffer.WriteOnly)
+    writer = QImageWriter(buffer, preset.image_format.encode())
+    if preset.image_format == 'PNG':
+        # Qt ждёт степень сжатия 0-100 и сам переводит её в уровень zlib (x * 9 / 91)
+        writer.setCompression((preset.compression * 91 + 8) // 9)
+    if preset.quality >= 0:
+        writer.setQuality(preset.quality)
+    if not writer.write(image):
+        raise ValueError(f'Не удалось закодировать изображение в {preset.image_format}: {writer.errorString()}')
+    buffer.close()
+
+    result = EncodeResult(bytes(data), preset, time.perf_counter() - start)
+    logger.debug(
+        '%s %dx%d: %.1f ms, %d bytes',
+        preset.image_format, image.width(), image.height(), result.seconds * 1000, result.size,
+    )
+    return result
+
+
+class EncodeService:
+    """Пул потоков для кодирования, чтобы большие PNG не блокировали цикл событий Qt."""
+
+    def __init__(self, max_workers=None):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix='encode',
+        )
+
+    def submit(self, image, preset=PRESETS['png']):
+        return self.executor.submit(encode, image, preset)
+
+    def map(self, images, preset=PRESETS['png']):
+        return [self.submit(image, preset) for image in images]
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def shared_service():
+    """Общий пул кодирования приложения; создаётся при первом снимке, который надо закодировать."""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = EncodeService()
+        return _shared_service
@@ -0,0 +1,18 @@
+from PyQt5.QtGui import QImage, QPainter
+
+
+def render_selection(frame, rect, layers=()):
+    """Собирает изображение размером с выделение: только нужный кусок кадра и пересекающие его слои."""
+    rect = rect.normalized().intersected(frame.rect())
+    if rect.isEmpty():
+        return QImage()
+
+    # Копируются только мониторы, которые задевает выделение
+    image = frame.crop(rect)
+    painter = QPainter(image)
+    painter.translate(-rect.topLeft())
+    painter.setClipRect(rect)
+    for layer in layers:
+        layer(painter, rect)
+    painter.end()
+    return image
@@ -0,0 +1,130 @@
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+
+from capture import CapturedFrame
+
+
+class Grabber:
+    """Источник кадров с интерфейсом как у mss: monitors[0] - весь стол, дальше по монитору.
+
+    grab(region) принимает словарь left/top/width/height в пикселях экрана и возвращает CapturedFrame.
+    """
+
+    monitors = []
+
+    def grab(self, region):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssGrabber(Grabber):
+    def __init__(self):
+        import mss
+
+        self.sct = mss.mss()
+
+    @property
+    def monitors(self):
+        return self.sct.monitors
+
+    def grab(self, region):
+        return CapturedFrame.from_mss(self.sct.grab(region))
+
+    def close(self):
+        self.sct.close()
+
+
+def with_desktop(rects):
+    """Список мониторов как у mss из прямоугольников (left, top, width, height): первым - весь стол."""
+    monitors = [{'left': left, 'top': top, 'width': width, 'height': height} for left, top, width, height in rects]
+    left = min(monitor['left'] for monitor in monitors)
+    top = min(monitor['top'] for monitor in monitors)
+    right = max(monitor['left'] + monitor['width'] for monitor in monitors)
+    bottom = max(monitor['top'] + monitor['height'] for monitor in monitors)
+    desktop = {'left': left, 'top': top, 'width': right - left, 'height': bottom - top}
+    return [desktop] + monitors
+
+
+def side_by_side(sizes):
+    rects = []
+    left = 0
+    for width, height in sizes:
+        rects.append((left, 0, width, height))
+        left += width
+    return with_desktop(rects)
+
+
+class FakeGrabber(Grabber):
+    """Детерминированный источник для тестов и бенчмарков без дисплея.
+
+    sizes - мониторы в ряд; rects - явная раскладка (left, top, width, height), например со сдвигом по высоте.
+    pattern: 'gradient', 'noise' (с фиксированным seed) или путь к картинке, растянутой на каждый монитор.
+    ns_per_pixel эмулирует стоимость настоящего снимка.
+    """
+
+    def __init__(self, sizes=((1920, 1080),), pattern='gradient', ns_per_pixel=0.0, seed=0, rects=None):
+        # numpy только здесь: MssGrabber грузится при прогреве, и модуль не должен тянуть numpy
+        import numpy as np
+
+        self.monitors = with_desktop(rects) if rects else side_by_side(sizes)
+        self.ns_per_pixel = ns_per_pixel
+        desktop = self.monitors[0]
+        self.pixels = np.zeros((desktop['height'], desktop['width'], 4), dtype=np.uint8)
+        for index, monitor in enumerate(self.monitors[1:]):
+            top = monitor['top'] - desktop['top']
+            left = monitor['left'] - desktop['left']
+            area = self.pixels[top:top + monitor['height'], left:left + monitor['width']]
+            area[:] = make_pattern(pattern, monitor['width'], monitor['height'], seed + index)
+        self.grabs = 0
+
+    def grab(self, region):
+        import numpy as np
+
+        if self.ns_per_pixel:
+            time.sleep(region['width'] * region['height'] * self.ns_per_pixel / 1e9)
+        self.grabs += 1
+
+        desktop = self.monitors[0]
+        top = region['top'] - desktop['top']
+        left = region['left'] - desktop['left']
+        pixels = self.pixels[top:top + region['height'], left:left + region['width']]
+        raw = bytearray(np.ascontiguousarray(pixels).tobytes())
+        return CapturedFrame(raw, pixels.shape[1], pixels.shape[0], region['left'], region['top'])
+
+
+def make_pattern(pattern, width, height, seed=0):
+    import numpy as np
+
+    if pattern == 'gradient':
+        pixels = np.empty((height, width, 4), dtype=np.uint8)
+        pixels[..., 0] = (np.arange(width) * 255 // max(width - 1, 1))[None, :]
+        pixels[..., 1] = (np.arange(height) * 255 // max(height - 1, 1))[:, None]
+        pixels[..., 2] = ((np.arange(width)[None, :] // 64 + np.arange(height)[:, None] // 64) % 2) * 255
+        pixels[..., 3] = 255
+        return pixels
+
+    if pattern == 'noise':
+        pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+        pixels[..., 3] = 255
+        return pixels
+
+    image = QImage(pattern)
+    if image.isNull():
+        raise ValueError(f'Неизвестный шаблон или файл: {pattern}')
+    image = image.scaled(width, height, Qt.IgnoreAspectRatio).convertToFormat(QImage.Format_RGB32)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, dtype=np.uint8).reshape(height, image.bytesPerLine())
+    return rows[:, :width * 4].reshape(height, width, 4).copy()
+
+
+def create_grabber(name='mss', **options):
+    if name == 'mss':
+        return MssGrabber()
+    if name == 'fake':
+        return FakeGrabber(**options)
+    raise ValueError(f'Неизвестный источник кадров: {name}')
@@ -0,0 +1,160 @@
+"""Захват области экрана без оверлея и иконки в трее.
+
+    python -m headless --rect 0,0,800,600 --out shot.png
+    python -m headless --monitor 2 --annotations notes.json --out - > shot.png
+    python -m headless --batch jobs.json
+    python -m headless --backend fake --fake-size 3840x2160 --out shot.png
+
+Файл аннотаций - список фигур в координатах области:
+    [{"type": "line", "points": [[10, 10], [200, 40]], "color": "#f00", "width": 3}]
+Файл пакета - список заданий с ключами rect / monitor / annotations / out / preset.
+"""
+import argparse
+import json
+import os
+import sys
+
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QGuiApplication, QPen, QPainterPath
+
+from annotations import Annotation, AnnotationModel
+from encoder import PRESETS, EncodeService, encode
+from export import render_selection
+from render_style import parse_color
+from grabbers import create_grabber
+from stroke import build_path
+
+
+def ensure_application():
+    app = QGuiApplication.instance()
+    if app is None:
+        if sys.platform.startswith('linux') and not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        app = QGuiApplication(sys.argv[:1])
+    return app
+
+
+def parse_rect(value):
+    left, top, width, height = (int(part) for part in value.split(','))
+    return {'left': left, 'top': top, 'width': width, 'height': height}
+
+
+def parse_size(value):
+    width, height = (int(part) for part in value.lower().split('x'))
+    return width, height
+
+
+def build_annotations(spec):
+    model = AnnotationModel()
+    for shape in spec:
+        points = [QPointF(x, y) for x, y in shape['points']]
+        pen = QPen(parse_color(shape.get('color', '#f00')), shape.get('width', 3))
+        kind = shape['type']
+        if kind in ('pencil', 'line'):
+            path = build_path(points)
+        elif kind == 'rectangle':
+            path = QPainterPath()
+            start, end = points[0], points[-1]
+            path.addRect(start.x(), start.y(), end.x() - start.x(), end.y() - start.y())
+        else:
+            raise ValueError(f'Неизвестный тип аннотации: {kind}')
+        model.add(Annotation(kind, path, pen))
+    return model
+
+
+def grab_region(grabber, rect=None, monitor=1):
+    region = rect if rect is not None else grabber.monitors[monitor]
+    return grabber.grab(region)
+
+
+def render(frame, annotations=None):
+    model = build_annotations(annotations or [])
+    return render_selection(frame, frame.rect(), [model.render])
+
+
+def capture_region(rect=None, monitor=1, annotations=None, grabber=None):
+    """Снимает область (словарь left/top/width/height в пикселях экрана) или монитор и возвращает QImage."""
+    ensure_application()
+    if grabber is not None:
+        return render(grab_region(grabber, rect, monitor), annotations)
+
+    grabber = create_grabber('mss')
+    try:
+        frame = grab_region(grabber, rect, monitor)
+    finally:
+        grabber.close()
+    return render(frame, annotations)
+
+
+def write_output(data, out):
+    if out == '-':
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    else:
+        with open(out, 'wb') as output:
+            output.write(data)
+
+
+def preset_for(out, name=None):
+    if name:
+        return PRESETS[name]
+    extension = os.path.splitext(out)[1].lower()
+    return {'.jpg': PRESETS['jpeg'], '.jpeg': PRESETS['jpeg'], '.webp': PRESETS['webp_lossless']}.get(extension, PRESETS['png'])
+
+
+def load_json(path):
+    with open(path) as json_file:
+        return json.load(json_file)
+
+
+def run_batch(jobs, grabber):
+    # Снимаем по очереди (дескриптор захвата один), кодируем параллельно
+    encoder = EncodeService()
+    pending = []
+    for job in jobs:
+        rect = parse_rect(job['rect']) if isinstance(job.get('rect'), str) else job.get('rect')
+        annotations = job.get('annotations')
+        if isinstance(annotations, str):
+            annotations = load_json(annotations)
+        image = render(grab_region(grabber, rect, job.get('monitor', 1)), annotations)
+        pending.append((job['out'], encoder.submit(image, preset_for(job['out'], job.get('preset')))))
+
+    for out, future in pending:
+        write_output(future.result().data, out)
+    encoder.shutdown()
+    return len(pending)
+
+
+def main(argv=None, grabber=None):
+    parser = argparse.ArgumentParser(prog='headless', description='Скриншот области экрана без оверлея')
+    parser.add_argument('--rect', type=parse_rect, help='left,top,width,height в пикселях экрана')
+    parser.add_argument('--monitor', type=int, default=1, help='номер монитора mss (0 - все сразу)')
+    parser.add_argument('--annotations', help='JSON-файл с аннотациями')
+    parser.add_argument('--out', default='-', help='файл или "-" для stdout')
+    parser.add_argument('--preset', choices=sorted(PRESETS), help='пресет кодирования')
+    parser.add_argument('--batch', help='JSON-файл со списком заданий')
+    parser.add_argument('--backend', choices=['mss', 'fake'], default='mss', help='источник кадров')
+    parser.add_argument('--fake-size', type=parse_size, action='append', help='WxH монитора для --backend fake')
+    parser.add_argument('--fake-pattern', default='gradient', help='gradient, noise или путь к картинке')
+    args = parser.parse_args(argv)
+
+    ensure_application()
+
+    if grabber is None:
+        if args.backend == 'fake':
+            grabber = create_grabber('fake', sizes=args.fake_size or [(1920, 1080)], pattern=args.fake_pattern)
+        else:
+            grabber = create_grabber('mss')
+
+    if args.batch:
+        run_batch(load_json(args.batch), grabber)
+        return 0
+
+    annotations = load_json(args.annotations) if args.annotations else None
+    image = capture_region(args.rect, args.monitor, annotations, grabber)
+    write_output(encode(image, preset_for(args.out, args.preset)).data, args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
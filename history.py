@@ -0,0 +1,196 @@
+import glob
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt, QRect
+
+from capture import CapturedFrame, DesktopCapture
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 256
+SPILL_PATTERN = 'capture_*.zlib'
+
+
+class FrameRecord:
+    """Сжатый кадр одного монитора и всё, что нужно, чтобы собрать CapturedFrame обратно."""
+
+    def __init__(self, frame, geometry):
+        self.width = frame.width
+        self.height = frame.height
+        self.left = frame.left
+        self.top = frame.top
+        # Глобальная логическая геометрия, чтобы DesktopCapture пересчитал её сам
+        self.geometry = QRect(geometry)
+        self.blob = zlib.compress(frame.raw, 1)
+        self.path = None
+
+    @property
+    def nbytes(self):
+        return len(self.blob) if self.blob is not None else 0
+
+    def spill(self, path):
+        with open(path, 'wb') as blob_file:
+            blob_file.write(self.blob)
+        self.path = path
+        self.blob = None
+
+    def load_blob(self):
+        if self.blob is not None:
+            return self.blob
+        with open(self.path, 'rb') as blob_file:
+            return blob_file.read()
+
+    def drop_file(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def to_frame(self):
+        frame = CapturedFrame(bytearray(zlib.decompress(self.load_blob())), self.width, self.height, self.left, self.top)
+        frame.set_geometry(self.geometry)
+        return frame
+
+
+class HistoryEntry:
+    def __init__(self, entry_id, capture):
+        self.id = entry_id
+        self.timestamp = time.time()
+        origin = capture.geometry.topLeft()
+        self.records = [FrameRecord(frame, frame.geometry.translated(origin)) for frame in capture.frames]
+        self._thumbnail = None
+
+    @property
+    def memory_bytes(self):
+        return sum(record.nbytes for record in self.records)
+
+    @property
+    def on_disk(self):
+        return any(record.path for record in self.records)
+
+    def to_capture(self):
+        return DesktopCapture([record.to_frame() for record in self.records])
+
+    def thumbnail(self, size=THUMBNAIL_SIZE):
+        # Превью распаковываем только по запросу и запоминаем
+        if self._thumbnail is None:
+            capture = self.to_capture()
+            self._thumbnail = capture.crop(capture.rect()).scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return self._thumbnail
+
+
+class CaptureHistory:
+    """Последние снимки: свежие сжатыми в памяти, старые на диске, вытеснение по LRU."""
+
+    def __init__(self, folder, memory_limit, disk_limit, max_entries=50):
+        self.folder = folder
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.max_entries = max_entries
+
+        self.entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Сжатие занимает время, поэтому идёт в фоне после закрытия оверлея
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history')
+        # Номера снимков начинаются заново, а файлы прошлого запуска - полные снимки
+        # экрана без индекса и вне disk_limit, поэтому удаляем их
+        self.remove_spill_files()
+
+    @classmethod
+    def from_settings(cls, folder, config):
+        return cls(
+            folder,
+            config.history_memory_mb * 2 ** 20,
+            config.history_disk_mb * 2 ** 20,
+            config.history_size,
+        )
+
+    def add(self, capture):
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+        return self.executor.submit(self._add, entry_id, capture)
+
+    def _add(self, entry_id, capture):
+        entry = HistoryEntry(entry_id, capture)
+        with self._lock:
+            self.entries[entry_id] = entry
+            self._evict()
+        return entry_id
+
+    def ids(self):
+        # От новых к старым
+        with self._lock:
+            return sorted(self.entries, key=lambda entry_id: self.entries[entry_id].timestamp, reverse=True)
+
+    def get(self, entry_id):
+        with self._lock:
+            entry = self.entries[entry_id]
+            self.entries.move_to_end(entry_id)
+        return entry.to_capture()
+
+    def thumbnail(self, entry_id, size=THUMBNAIL_SIZE):
+        with self._lock:
+            entry = self.entries[entry_id]
+        return entry.thumbnail(size)
+
+    def memory_bytes(self):
+        return sum(entry.memory_bytes for entry in self.entries.values())
+
+    def disk_bytes(self):
+        total = 0
+        for entry in self.entries.values():
+            for record in entry.records:
+                if record.path and os.path.exists(record.path):
+                    total += os.path.getsize(record.path)
+        return total
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+        # Давно не открывавшиеся снимки уходят на диск
+        for entry in list(self.entries.values()):
+            if self.memory_bytes() <= self.memory_limit:
+                break
+            if not entry.on_disk:
+                self._spill(entry)
+
+        for entry_id, entry in list(self.entries.items()):
+            if self.disk_bytes() <= self.disk_limit:
+                break
+            if entry.on_disk:
+                self._remove(entry_id)
+
+    def _spill(self, entry):
+        os.makedirs(self.folder, exist_ok=True)
+        for index, record in enumerate(entry.records):
+            record.spill(os.path.join(self.folder, f'capture_{entry.id}_{index}.zlib'))
+
+    def _remove(self, entry_id):
+        entry = self.entries.pop(entry_id)
+        for record in entry.records:
+            record.drop_file()
+
+    def remove_spill_files(self):
+        for path in glob.glob(os.path.join(self.folder, SPILL_PATTERN)):
+            try:
+                os.remove(path)
+            except OSError as error:
+                logger.warning('Не удалось удалить %s: %s', path, error)
+
+    def clear(self):
+        with self._lock:
+            for entry_id in list(self.entries):
+                self._remove(entry_id)
+            self.remove_spill_files()
+
+    def shutdown(self):
+        # При выходе дожидаемся сжатия в фоне, чтобы не осталось недописанных файлов
+        self.executor.shutdown(wait=True)
+        self.clear()
@@ -0,0 +1,50 @@
+import logging
+import time
+
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+from instrumentation import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class HotkeyDispatcher(QObject):
+    """Переносит нажатия глобальных хоткеев из потока keyboard в цикл событий Qt.
+
+    Колбэк keyboard только испускает сигнал; метод приложения вызывается по имени
+    уже в потоке GUI, в порядке нажатий.
+    """
+
+    triggered = pyqtSignal(str, float)
+    # Обработчик хоткея упал: имя метода и текст ошибки
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, target, bindings, parent=None):
+        super().__init__(parent)
+        self.target = target
+        self.bindings = bindings
+        # Время нажатия, которое сейчас обрабатывается, иначе None
+        self.pressed = None
+        self.triggered.connect(self.dispatch, Qt.QueuedConnection)
+
+    def register(self):
+        import keyboard
+
+        for hotkey, method in self.bindings.items():
+            keyboard.add_hotkey(hotkey, self.press, args=(method,))
+
+    def press(self, method):
+        # Поток keyboard: к виджетам не обращаемся, только кладём событие в очередь
+        self.triggered.emit(method, time.perf_counter())
+
+    def dispatch(self, method, pressed):
+        tracer.record('hotkey_queue', pressed, time.perf_counter() - pressed, {'method': method})
+        self.pressed = pressed
+        try:
+            getattr(self.target, method)()
+        except Exception as error:
+            # Исключение из слота PyQt завершает процесс, поэтому ловим его здесь
+            logger.exception('Хоткей %s завершился ошибкой', method)
+            self.failed.emit(method, str(error))
+        finally:
+            self.pressed = None
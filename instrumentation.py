@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+MAX_EVENTS = 200000
+SAMPLES_PER_STAGE = 1024
+
+
+class FrameCounter:
+    """Счётчик времени отрисовки кадров и перерисованной площади."""
+
+    def __init__(self, size=240):
+        self.times = deque(maxlen=size)
+        self.frames = 0
+        self.pixels = 0
+
+    def add(self, seconds, rect):
+        self.times.append(seconds)
+        self.frames += 1
+        self.pixels += rect.width() * rect.height()
+
+    def average_ms(self):
+        if not self.times:
+            return 0.0
+        return sum(self.times) / len(self.times) * 1000
+
+    def reset(self):
+        self.times.clear()
+        self.frames = 0
+        self.pixels = 0
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLES_PER_STAGE)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p95_ms': round(p95 * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class Tracer:
+    """Таймеры и счётчики горячих путей.
+
+    Пока трассировка выключена, span/timed/count только проверяют флаг.
+    Включённая пишет события в кольцевой буфер, который выгружается в формате Chrome trace
+    (chrome://tracing, Perfetto), и сводку по стадиям для лога.
+    """
+
+    def __init__(self, enabled=False, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.stages = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        if not self.enabled:
+            self.reset()
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.stages.clear()
+            self.counters.clear()
+            self.started = time.perf_counter()
+
+    def record(self, name, start, duration, args=None):
+        if not self.enabled:
+            return
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': round((start - self.started) * 1e6, 1),
+            'dur': round(duration * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+            self.stages.setdefault(name, StageStats()).add(duration)
+
+    @contextmanager
+    def span(self, name, **args):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, args)
+
+    def timed(self, name=None):
+        # Декоратор: имя стадии по умолчанию - имя функции
+        def decorator(function):
+            stage = name or function.__name__
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(stage, start, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            total = self.counters[name] = self.counters.get(name, 0) + value
+            self.events.append({
+                'name': name,
+                'ph': 'C',
+                'ts': round((time.perf_counter() - self.started) * 1e6, 1),
+                'pid': os.getpid(),
+                'args': {name: total},
+            })
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            stages = {name: stats.summary() for name, stats in sorted(self.stages.items())}
+            counters = dict(self.counters)
+        paints = stages.get('paintEvent', {}).get('count', 0)
+        captures = stages.get('on_captured', {}).get('count', 0)
+        return {
+            'elapsed_s': round(elapsed, 1),
+            'stages': stages,
+            'counters': counters,
+            'paints_per_second': round(paints / elapsed, 1) if elapsed else 0.0,
+            'bytes_per_capture': counters.get('capture_bytes', 0) // captures if captures else 0,
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        logger.info(
+            'Трассировка за %.1f с: %.1f перерисовок/с, %d байт на снимок',
+            summary['elapsed_s'], summary['paints_per_second'], summary['bytes_per_capture'],
+        )
+        for name, stats in summary['stages'].items():
+            logger.info(
+                '  %-20s n=%-6d avg %.2f мс, p95 %.2f мс, max %.2f мс',
+                name, stats['count'], stats['avg_ms'], stats['p95_ms'], stats['max_ms'],
+            )
+        return summary
+
+    def export_chrome_trace(self, path):
+        with self._lock:
+            events = list(self.events)
+        names = [{
+            'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': thread.ident,
+            'args': {'name': thread.name},
+        } for thread in threading.enumerate()]
+        with open(path, 'w') as trace_file:
+            json.dump({'traceEvents': names + events, 'displayTimeUnit': 'ms'}, trace_file)
+        return len(events)
+
+
+# Общий трассировщик приложения; включается переменной окружения или хоткеем
+tracer = Tracer(enabled=bool(os.environ.get('SCREENSHOT_TRACE')))
@@ -0,0 +1,164 @@
+import math
+
+from PyQt5.QtCore import Qt, QRect, QRectF, QPoint
+from PyQt5.QtGui import QColor, QPen, QFont, QPainter
+
+LOUPE_SIZE = 160  # сторона квадрата лупы в логических пикселях
+READOUT_HEIGHT = 22
+CURSOR_OFFSET = 24
+PYRAMID_LEVELS = 3  # исходный кадр, половина, четверть
+MIN_ZOOM = 1
+MAX_ZOOM = 32
+
+
+def build_pyramid(image, levels=PYRAMID_LEVELS):
+    """Уровень 0 - сам кадр без копии, дальше каждый уровень вдвое меньше предыдущего."""
+    pyramid = [image]
+    for _ in range(levels - 1):
+        previous = pyramid[-1]
+        if min(previous.width(), previous.height()) < 2:
+            break
+        pyramid.append(previous.scaled(
+            previous.width() // 2, previous.height() // 2, Qt.IgnoreAspectRatio, Qt.SmoothTransformation,
+        ))
+    return pyramid
+
+
+def build_pyramids(capture):
+    return {id(frame): build_pyramid(frame.image) for frame in capture.frames}
+
+
+class Magnifier:
+    """Лупа у курсора с увеличением и цветом пикселя под ним.
+
+    Рисуется слоем холста прямо из буфера снимка; при движении мыши перерисовывается
+    только область лупы. Пирамида уменьшенных копий строится в фоне и нужна, когда
+    увеличение меньше плотности пикселей экрана (например, 1x-2x на мониторе со scale 2).
+    """
+
+    def __init__(self, zoom=8, size=LOUPE_SIZE):
+        self.zoom = zoom
+        self.size = size
+        self.enabled = True
+        self.visible = False
+        self.pos = None
+        self.capture = None
+        self.pyramids_future = None
+
+        self.border_pen = QPen(QColor(255, 255, 255, 220), 1)
+        self.cross_pen = QPen(QColor(255, 0, 0, 200), 1)
+        self.readout_color = QColor(0, 0, 0, 190)
+        self.text_pen = QPen(QColor(255, 255, 255))
+        self.font = QFont()
+        self.font.setPointSize(9)
+
+    def set_capture(self, capture, executor=None):
+        self.capture = capture
+        self.pyramids_future = executor.submit(build_pyramids, capture) if executor else None
+
+    def clear(self):
+        if self.pyramids_future is not None:
+            self.pyramids_future.cancel()
+        self.capture = None
+        self.pyramids_future = None
+        self.visible = False
+        self.pos = None
+
+    def rect(self, pos=None, visible=None):
+        pos = self.pos if pos is None else pos
+        visible = self.visible if visible is None else visible
+        if pos is None or not visible or self.capture is None:
+            return QRect()
+
+        # Лупа справа снизу от курсора, у края экрана - с другой стороны
+        bounds = self.capture.rect()
+        width, height = self.size, self.size + READOUT_HEIGHT
+        x = pos.x() + CURSOR_OFFSET
+        y = pos.y() + CURSOR_OFFSET
+        if x + width > bounds.right():
+            x = pos.x() - CURSOR_OFFSET - width
+        if y + height > bounds.bottom():
+            y = pos.y() - CURSOR_OFFSET - height
+        return QRect(x, y, width, height)
+
+    def move(self, pos, visible=True):
+        """Переносит лупу и возвращает область, которую надо перерисовать."""
+        visible = visible and self.enabled and self.capture is not None
+        old = self.rect()
+        self.pos = QPoint(pos)
+        self.visible = visible
+        return old.united(self.rect()).adjusted(-1, -1, 1, 1)
+
+    def hide(self):
+        old = self.rect()
+        self.visible = False
+        return old.adjusted(-1, -1, 1, 1)
+
+    def set_zoom(self, zoom):
+        self.zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        return self.rect().adjusted(-1, -1, 1, 1)
+
+    def level(self, frame, zoom):
+        # Экранных пикселей лупы на физический пиксель снимка меньше 1 - берём уменьшенную копию
+        levels = self.pyramid(frame)
+        index = int(math.floor(math.log2(frame.scale / zoom))) if frame.scale > zoom else 0
+        index = max(0, min(len(levels) - 1, index))
+        return levels[index], 2 ** index
+
+    def pyramid(self, frame):
+        future = self.pyramids_future
+        if future is not None and future.done() and not future.cancelled() and not future.exception():
+            return future.result().get(id(frame), [frame.image])
+        return [frame.image]
+
+    def color_at(self, pos):
+        frame = self.capture.frame_at(pos) if self.capture else None
+        if frame is None:
+            return None
+        source = frame.source_rect(QRect(pos, pos))
+        x = min(frame.width - 1, int(source.x()))
+        y = min(frame.height - 1, int(source.y()))
+        return QColor(frame.image.pixel(x, y))
+
+    def draw(self, painter, rect):
+        loupe = self.rect()
+        if loupe.isEmpty() or not loupe.intersects(rect):
+            return
+        frame = self.capture.frame_at(self.pos)
+        if frame is None:
+            return
+
+        view = QRect(loupe.x(), loupe.y(), self.size, self.size)
+        span = self.size / self.zoom
+        area = QRectF(self.pos.x() + 0.5 - span / 2, self.pos.y() + 0.5 - span / 2, span, span)
+        image, divisor = self.level(frame, self.zoom)
+        source = frame.source_rect(area)
+        source = QRectF(source.x() / divisor, source.y() / divisor, source.width() / divisor, source.height() / divisor)
+
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        painter.setClipRect(view)
+        painter.fillRect(view, Qt.black)
+        painter.drawImage(QRectF(view), image, source)
+
+        # Перекрестие на пикселе под курсором
+        cell = max(1.0, float(self.zoom))
+        middle = QRectF(view).center()
+        center = QRectF(middle.x() - cell / 2, middle.y() - cell / 2, cell, cell)
+        painter.setPen(self.cross_pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(center)
+        painter.setClipping(False)
+
+        painter.setPen(self.border_pen)
+        painter.drawRect(view.adjusted(0, 0, -1, -1))
+
+        readout = QRect(loupe.x(), view.bottom() + 1, self.size, READOUT_HEIGHT)
+        painter.fillRect(readout, self.readout_color)
+        color = self.color_at(self.pos)
+        if color is not None:
+            painter.setPen(self.text_pen)
+            painter.setFont(self.font)
+            text = f'{color.name().upper()}  {color.red()},{color.green()},{color.blue()}  x{self.zoom}'
+            painter.drawText(readout, Qt.AlignCenter, text)
+        painter.restore()
@@ -1,19 +1,30 @@
+import logging
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
-import keyboard
-import mss
-import mss.tools
-import win32clipboard
-from PIL import Image
-from PyQt5.QtCore import Qt, QTimer, QPoint, QBuffer
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QColor, QIcon, QPen, QPainterPath
-from PyQt5.QtWidgets import QMainWindow, QApplication, QSystemTrayIcon, QGridLayout
-
+from PyQt5.QtCore import Qt, QTimer, QPoint, QRect, QDateTime, QStandardPaths, pyqtSignal
+from PyQt5.QtGui import QIcon, QPainterPath
+from PyQt5.QtWidgets import QMainWindow, QApplication, QSystemTrayIcon, QGridLayout, QWidget
+
+from annotation_layer import TiledLayer
+from annotations import Annotation, AnnotationModel
+from capture import CaptureSession, CaptureWorker
+from encoder import EncodePreset
+from history import CaptureHistory
+from hotkeys import HotkeyDispatcher
+from instrumentation import tracer
+from export import render_selection
+from magnifier import Magnifier
 from main_canvas import ScreenShotCanvas
 from rectangle_drawer import RectangleDrawer
+from render_style import RenderStyle
+from sinks import SinkWorker, FileSink, clipboard_sink
+from stroke import StrokeBuilder
 
+logger = logging.getLogger(__name__)
 
 
 class MouseAction(Enum):
@@ -21,22 +32,62 @@ class MouseAction(Enum):
     Pencil = 'pencil'
     Line = 'line'
     Rectangle = 'rectangle'
+    Pixelate = 'pixelate'
+    Blur = 'blur'
+
+
+# Горячая клавиша -> метод ScreenshotApp
+HOTKEYS = {
+    'f3': 'make_screenshot',
+    'shift + f3': 'reopen_history',
+    'esc': 'close_screenshot',
+    'ctrl + c': 'clip_screenshot',
+    'ctrl + s': 'save_screenshot',
+    'ctrl + z': 'undo_annotation',
+    'ctrl + y': 'redo_annotation',
+    'f4': 'toggle_recording',
+    'f5': 'toggle_scroll_capture',
+    # Ctrl+Shift+T занят браузерами (вернуть вкладку), а keyboard не глушит нажатие
+    'ctrl + shift + f12': 'toggle_tracing',
+}
+
+TRACE_SUMMARY_INTERVAL = 60 * 1000  # мс между сводками в лог, пока включена трассировка
+# hide() не убирает окно с экрана мгновенно (композитор дорисовывает кадр),
+# поэтому запись и прокрутка снимают первый кадр с такой задержкой, с
+OVERLAY_HIDE_DELAY = 0.15
+
+
+def remove_scroll_leftovers():
+    # scroll_capture тоже тянет numpy, поэтому чистка идёт в фоновом потоке
+    from scroll_capture import remove_stale_canvases
+
+    remove_stale_canvases()
+
+
+def build_edge_index(capture):
+    # snapping тянет numpy, поэтому импортируется в фоновом потоке, а не на пути F3
+    from snapping import EdgeIndex
+
+    return EdgeIndex.from_capture(capture)
 
 
 class ScreenshotApp(QMainWindow):
+    # Запись остановлена в фоне: заголовок и текст сообщения в трей
+    recording_finished = pyqtSignal(str, str)
 
-    def __init__(self):
+    def __init__(self, grabber_factory=None, clipboard=None, hotkeys=True):
         super().__init__()
 
         self.action = MouseAction.Select.value
 
         self.pencil_drawing = False
-        self.pencil_points = []
 
         self.line_drawing = False
-        self.line_points = []
 
-        self.current_path = None
+        self.current_stroke = None
+        # Незавершённый штрих карандаша дорисовывается сюда по отрезкам
+        self.live_layer = TiledLayer()
+        self.smooth_strokes = True
 
         self.current_line = None
         self.line_start = None # При mouse move постоянно перемешаемся туда
@@ -44,161 +95,476 @@ class ScreenshotApp(QMainWindow):
         self.current_rect = None
         self.rect_start = None
 
-        self.drawing_buffer = QPixmap()
+        # Рамка пикселизации/размытия, пока её тянут
+        self.redact_rect = None
+        self.redact_start = None
 
+        self.annotations = AnnotationModel()
+        # Стиль по умолчанию до чтения settings.ini, потом - из настроек
+        self.render_style = RenderStyle()
+        self.draw_pen = self.render_style.draw_pen
+        self.settings_watcher = None
 
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
 
-        self.tray_icon = QSystemTrayIcon(self)
-        self.tray_icon.setIcon(QIcon('tray_icon.ico'))
-        self.tray_icon.activated.connect(self.make_screenshot)
-        self.tray_icon.show()
+        self.tray_icon = None
 
-        self.screenshot_label = ScreenShotCanvas(self)
+        with tracer.span('startup.canvas'):
+            self.screenshot_label = ScreenShotCanvas(self)
         self.screenshot_label.tools_signal.connect(self.change_action)
+        self.screenshot_label.tools_panel.extract_text.connect(self.extract_text)
         self.screenshot_label.tools_panel.hide()
-        self.screenshot_image = None
+        self.frame = None
+
+        # Настройки (pydantic), история и буфер обмена создаются при первом обращении
+        self._settings = None
+        self._history = None
+        self._clipboard_sink = None
+        self._ocr = None
+        self._redactor = None
+        self.clipboard_backend = clipboard
+        self.output = SinkWorker()
+        # Позиция в истории, если сейчас открыт старый снимок
+        self.history_position = None
+        self.last_history_add = None
 
         self.is_screening = False
         self.rect_drawer = RectangleDrawer(self.screenshot_label)
+        self.screenshot_label.selection_source = self.rect_drawer
+        # Фоновый разбор снимка: индекс краёв и пирамида для лупы
+        self.analysis_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analysis')
+        self.magnifier = Magnifier()
+        self.screenshot_label.layers.append(self.paint_overlay)
+        self.screenshot_label.frame_shown.connect(self.on_frame_shown)
+
+        with tracer.span('startup.capture_session'):
+            self.capture = CaptureSession(grabber_factory)
+        # Снимок делается в своём потоке, оверлей открывается по сигналу в потоке GUI
+        self.capture_worker = CaptureWorker(self.capture, parent=self)
+        self.capture_worker.captured.connect(self.on_captured)
+        self.capture_worker.failed.connect(lambda error: self.show_message('Не удалось сделать снимок', error))
+        # Хоткеи приходят из потока keyboard и выполняются в цикле событий Qt
+        self.hotkey_dispatcher = HotkeyDispatcher(self, HOTKEYS, parent=self)
+        self.hotkey_dispatcher.failed.connect(lambda method, error: self.show_message('Ошибка: ' + method, error))
+        self.recorder = None
+        self.recording_finished.connect(self.show_message)
+        self.scroll_capture = None
+        # Вызывается с задержкой "хоткей -> оверлей на экране" в миллисекундах
+        self.latency_hook = None
+        self.capture_started = None
+
+        # Таймер работает всегда, сводку пишет только при включённой трассировке
+        self.trace_timer = QTimer(self)
+        self.trace_timer.timeout.connect(self.log_trace_summary)
+        self.trace_timer.start(TRACE_SUMMARY_INTERVAL)
 
         layout = QGridLayout()
         layout.addWidget(self.screenshot_label, 0, 0)
 
         self.setLayout(layout)
 
-        keyboard.add_hotkey('f3', self.make_screenshot)
-        keyboard.add_hotkey('esc', self.close_screenshot)
-        keyboard.add_hotkey('ctrl + c', self.clip_screenshot)
+        self.watch_displays()
+        QApplication.instance().aboutToQuit.connect(self.shutdown)
+
+        # Трей, хоткеи и прогрев - уже из цикла событий, чтобы процесс стартовал быстрее
+        self.hotkeys = hotkeys
+        self.startup_finished = False
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        with tracer.span('startup.tray'):
+            self.setup_tray()
+        if self.hotkeys:
+            with tracer.span('startup.hotkeys'):
+                self.register_hotkeys()
+        with tracer.span('startup.prewarm'):
+            self.prewarm()
+        with tracer.span('startup.settings'):
+            self.watch_settings()
+        # Склейки прокрутки от прошлых запусков - временные файлы до нескольких ГБ
+        self.analysis_executor.submit(remove_scroll_leftovers)
+        self.startup_finished = True
+
+    def setup_tray(self):
+        self.tray_icon = QSystemTrayIcon(self)
+        self.tray_icon.setIcon(QIcon('tray_icon.ico'))
+        self.tray_icon.activated.connect(lambda reason: self.make_screenshot())
+        self.tray_icon.show()
+
+    def shutdown(self):
+        # Файлы истории - полные снимки экрана, после выхода их не оставляем
+        if self._history is not None:
+            self._history.shutdown()
+
+    def register_hotkeys(self):
+        self.hotkey_dispatcher.register()
+
+    def watch_settings(self):
+        from settings import SettingsWatcher
 
+        self.apply_settings(self.settings.get_config())
+        self.settings_watcher = SettingsWatcher(self.settings, parent=self)
+        self.settings_watcher.changed.connect(self.apply_settings)
+
+    def apply_settings(self, config):
+        try:
+            style = RenderStyle.from_settings(config)
+        except ValueError as error:
+            logger.warning('Стиль из настроек не применён: %s', error)
+            return
+
+        self.render_style = style
+        self.draw_pen = style.draw_pen
+        self.screenshot_label.set_render_style(style)
+
+        self.rect_drawer.snap_enabled = config.snap_enabled
+        self.rect_drawer.snap_radius = config.snap_radius
+        self.magnifier.enabled = config.magnifier_enabled
+        self.magnifier.set_zoom(config.magnifier_zoom)
+
+        if self._ocr is not None:
+            self._ocr.language = config.ocr_language
+        if self._redactor is not None:
+            self._redactor.strength.update(pixelate=config.pixelate_block, blur=config.blur_radius)
+
+        if self._history is not None:
+            self._history.memory_limit = config.history_memory_mb * 2 ** 20
+            self._history.disk_limit = config.history_disk_mb * 2 ** 20
+            self._history.max_entries = config.history_size
+
+    @property
+    def settings(self):
+        if self._settings is None:
+            from settings import Settings
+
+            self._settings = Settings()
+        return self._settings
+
+    @property
+    def history(self):
+        if self._history is None:
+            self._history = CaptureHistory.from_settings(
+                os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation), 'history'),
+                self.settings.get_config(),
+            )
+        return self._history
+
+    @property
+    def ocr(self):
+        if self._ocr is None:
+            from ocr import OcrService
+
+            self._ocr = OcrService(self.settings.get_config().ocr_language, parent=self)
+            self._ocr.text_ready.connect(self.on_text_ready)
+            self._ocr.failed.connect(self.on_text_failed)
+        return self._ocr
+
+    @property
+    def redactor(self):
+        if self._redactor is None:
+            from redaction import Redactor
+
+            config = self.settings.get_config()
+            self._redactor = Redactor(parent=self)
+            self._redactor.strength.update(pixelate=config.pixelate_block, blur=config.blur_radius)
+            self._redactor.set_capture(self.frame)
+            self._redactor.changed.connect(self.screenshot_label.update)
+            self._redactor.redacted.connect(self.on_redacted)
+        return self._redactor
+
+    @property
+    def clipboard_sink(self):
+        if self._clipboard_sink is None:
+            self._clipboard_sink = clipboard_sink(self.clipboard_backend)
+        return self._clipboard_sink
+
+    def watch_displays(self):
+        app = QApplication.instance()
+        app.screenAdded.connect(self.on_screen_added)
+        app.screenRemoved.connect(self.on_display_changed)
+        for screen in app.screens():
+            screen.geometryChanged.connect(self.on_display_changed)
+
+    def on_screen_added(self, screen):
+        screen.geometryChanged.connect(self.on_display_changed)
+        self.on_display_changed()
+
+    def on_display_changed(self, *args):
+        self.capture.invalidate()
+        self.prewarm()
+
+    def prewarm(self):
+        # Готовим всё заранее, чтобы первое нажатие F3 не платило за инициализацию.
+        # Окно при этом остаётся скрытым: native-окно, полировка и геометрия не требуют show()
+        self.history
+        self.clipboard_sink
+        geometry = self.capture.geometry()
+        self.setGeometry(geometry)
+        self.screenshot_label.setGeometry(0, 0, geometry.width(), geometry.height())
+        self.winId()
+        self.ensurePolished()
+        self.screenshot_label.ensurePolished()
+        self.screenshot_label.tools_panel.ensurePolished()
+        self.screenshot_label.tools_panel.load_icons()
+        for button in self.screenshot_label.tools_panel.findChildren(QWidget):
+            button.ensurePolished()
+
+    def on_frame_shown(self):
+        if self.capture_started is None:
+            return
+        latency = (time.perf_counter() - self.capture_started) * 1000
+        tracer.record('overlay_latency', self.capture_started, latency / 1000)
+        self.capture_started = None
+        logger.info('Оверлей показан через %.1f мс после хоткея', latency)
+        if self.latency_hook:
+            self.latency_hook(latency)
+
+    @tracer.timed()
     def make_screenshot(self):
+        # Повторные F3, пока снимок снимается или уже показан, схлопываются в один
+        if self.capture_worker.busy or (self.is_screening and self.history_position is None):
+            tracer.count('coalesced_captures', 1)
+            return
+        if self.is_screening:
+            self.close_screenshot()
+
+        # Задержка считается от нажатия в потоке keyboard, если вызов пришёл оттуда
+        self.capture_started = self.hotkey_dispatcher.pressed or time.perf_counter()
+        # Все мониторы сразу, окно растягивается на весь рабочий стол
+        self.capture_worker.request(self.capture_started)
+
+    @tracer.timed()
+    def on_captured(self, capture, started):
+        tracer.count('capture_bytes', capture.nbytes)
+        self.capture_started = started
+        self.history_position = None
+        self.open_capture(capture)
+
+    def reopen_history(self):
+        if self.is_screening and self.history_position is None:
+            self.close_screenshot()
+
+        # Снимок, который только что закрыли, ещё может сжиматься в фоне
+        if self.last_history_add:
+            self.last_history_add.result()
+
+        ids = self.history.ids()
+        position = 0 if self.history_position is None else self.history_position + 1
+        if position >= len(ids):
+            return
+
+        self.capture_started = time.perf_counter()
+        frame = self.history.get(ids[position])
+        self.open_capture(frame)
+        self.history_position = position
+
+    def open_capture(self, frame):
         self.screenshot_label.show()
         self.rect_drawer.enable = True
         self.is_screening = True
-        self.drawing_buffer = QPixmap()
-        self.current_path = None
+        self.annotations.clear()
+        self.current_stroke = None
+        self.live_layer.clear()
         self.current_line = None
         self.current_rect = None
+        self.redact_rect = None
         self.screenshot_label.tools_panel.hide()
         self.screenshot_label.tools_panel.clear_action()
 
-        with mss.mss() as sct:
-            monitors = sct.monitors[1]
-            screenshot = sct.grab(monitors)
-            combined_rect = monitors
-
-            # Получаем геометрию окна
-            self.setGeometry(
-                combined_rect['left'],
-                combined_rect['top'],
-                combined_rect['width'],
-                combined_rect['height'],
-            )
-
-        self.screenshot_image = Image.frombytes(
-            'RGB',
-            screenshot.size,
-            screenshot.rgb
-        )
-        self.show_screenshot(screenshot)
-
-    def show_screenshot(self, screenshot):
-        img = QImage(screenshot.rgb, screenshot.width, screenshot.height, QImage.Format_RGB888)
+        self.frame = frame
+        self.setGeometry(self.frame.geometry)
 
-        # Делаем затемнение окна
-        dark_img = QImage(img.size(), QImage.Format_ARGB32)
-        dark_img.fill(QColor(0, 0, 0, 150))  # 180 = уровень затемнения
+        if self.rect_drawer.snap_enabled:
+            self.rect_drawer.set_edge_index(self.analysis_executor.submit(build_edge_index, frame))
+        self.magnifier.set_capture(frame, self.analysis_executor)
+        if self._redactor is not None:
+            self._redactor.set_capture(frame)
 
-        painter = QPainter(dark_img)
-        painter.setOpacity(0.5)
-        painter.drawImage(0, 0, img)
-        painter.end()
+        self.show_screenshot(self.frame)
 
-        # Отображаем в окне
+    @tracer.timed()
+    def show_screenshot(self, frame):
+        # Отображаем в окне, затемнение рисует сам холст
         self.screenshot_label.setGeometry(0, 0, self.width(), self.height())
-        self.screenshot_label.setPixmap(QPixmap.fromImage(dark_img))
+        self.screenshot_label.set_frame(frame)
         self.show()
 
     def save_screenshot(self):
-        print('Сохранено в буфер обмена')
+        if not self.is_screening:
+            return
+
+        cropped_image = self.export_selection()
+        if cropped_image is None:
+            return
+
+        preset = EncodePreset.from_settings(self.settings.get_config())
+        folder = QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
+        file_name = 'screenshot_' + QDateTime.currentDateTime().toString('yyyyMMdd_HHmmss') + preset.extension
+        self.output.submit(cropped_image, [FileSink(os.path.join(folder, file_name), preset)])
+        self.close_screenshot()
 
     def close_screenshot(self):
+        # Esc во время снятия: снимок, который ещё не пришёл, не показываем
+        self.capture_worker.cancel()
         if not self.is_screening:
             return
         self.rect_drawer.clear()
+        self.magnifier.clear()
+        if self._redactor is not None:
+            self._redactor.clear()
+        self.redact_rect = None
         self.screenshot_label.tools_panel.clear_action()
         # self.screenshot_label.tools_panel.hide()
         self.action = MouseAction.Select.value
         self.is_screening = False
         self.screenshot_label.clear()
         self.hide()
-        # Очищаем ресурсы
-        if hasattr(self, 'screenshot_image'):
-            del self.screenshot_image
+        # Кадр уходит в историю, сжатие идёт в фоне
+        if self.frame is not None and self.history_position is None:
+            self.last_history_add = self.history.add(self.frame)
+        self.history_position = None
+        self.frame = None
 
 
+    @tracer.timed()
     def clip_screenshot(self):
         if not self.is_screening:
             return
 
-        rect = self.rect_drawer.current_rect
-        x, y, w, h = (
-            rect.x(),
-            rect.y(),
-            rect.width(),
-            rect.height()
+        cropped_image = self.export_selection()
+        if cropped_image is None:
+            return
+
+        # Кодирование и запись в буфер обмена идут в рабочем потоке
+        self.output.submit(cropped_image, [self.clipboard_sink])
+        self.close_screenshot()
+        self.show_screenshot_notification()
+
+    def extract_text(self):
+        if not self.is_screening or not self.rect_drawer.current_rect:
+            return
+
+        # Тот же вырез, что и для буфера обмена, но без фигур - они мешают распознаванию.
+        # Пикселизация и размытие остаются: скрытый текст не должен попасть в буфер
+        if self._redactor is not None:
+            self._redactor.wait()
+        redactions = (MouseAction.Pixelate.value, MouseAction.Blur.value)
+        image = render_selection(
+            self.frame,
+            self.rect_drawer.current_rect,
+            [lambda painter, rect: self.annotations.render(painter, rect, redactions)],
         )
+        self.close_screenshot()
+        self.ocr.extract(image)
 
-        pixmap = QPixmap(self.size())
-        pixmap.fill(Qt.transparent)
+    def on_text_ready(self, text, seconds):
+        QApplication.clipboard().setText(text.strip())
+        self.show_message('Текст скопирован в буфер', f'{len(text.strip())} символов за {seconds * 1000:.0f} мс')
 
-        painter = QPainter(pixmap)
+    def on_text_failed(self, error):
+        self.show_message('Не удалось распознать текст', error)
 
-        if hasattr(self, 'screenshot_image') and self.screenshot_image:
-            screenshot_qimage = QImage(
-                self.screenshot_image.tobytes(),
-                self.screenshot_image.width,
-                self.screenshot_image.height,
-                QImage.Format_RGB888
-            )
-            painter.drawImage(0, 0, screenshot_qimage)
+    def export_selection(self):
+        rect = self.rect_drawer.current_rect
+        if not rect or not self.frame:
+            return None
 
-        if not self.drawing_buffer.isNull():
-            painter.drawPixmap(0, 0, self.drawing_buffer)
+        # В экспорт идут только досчитанные в полном разрешении фильтры
+        if self._redactor is not None:
+            self._redactor.wait()
 
-        if self.current_path:
-            painter.setPen(QPen(QColor(255, 0, 0), 3))
-            painter.drawPath(self.current_path)
+        return render_selection(
+            self.frame,
+            rect,
+            [self.annotations.render, self.live_layer.draw, self.paint_current_shapes],
+        )
 
-        if self.current_line:
-            painter.setPen(QPen(QColor(255, 0, 0), 3))
-            painter.drawPath(self.current_line)
+    def toggle_recording(self):
+        if self.recorder:
+            recorder = self.recorder
+            self.recorder = None
+            # stop() дожидается записи очереди кадров, на медленном диске это секунды
+            future = self.output.run(recorder.stop)
+            future.add_done_callback(lambda done: self.on_recording_stopped(done, recorder.writer.path))
+            return
 
-        painter.end()
+        if not self.is_screening or not self.rect_drawer.current_rect:
+            return
 
-        cropped_pixmap = pixmap.copy(x, y, w, h)
-        cropped_image = cropped_pixmap.toImage()
-        cropped_image = cropped_image.convertToFormat(QImage.Format_RGB32)
+        region = self.frame.monitor_region(self.rect_drawer.current_rect)
+        if not region or not region['width'] or not region['height']:
+            return
 
+        from recorder import RegionRecorder, FrameDirectoryWriter, region_grabber
+
+        folder = QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
+        name = 'recording_' + QDateTime.currentDateTime().toString('yyyyMMdd_HHmmss')
+        self.recorder = RegionRecorder(
+            region_grabber(self.capture, region),
+            FrameDirectoryWriter(os.path.join(folder, name)),
+        )
+        self.close_screenshot()
+        self.recorder.start(OVERLAY_HIDE_DELAY)
 
-        buffer = QBuffer()
-        buffer.open(QBuffer.ReadWrite)
-        cropped_image.save(buffer, "BMP")
+    def on_recording_stopped(self, future, path):
+        # Колбэк вызывается в потоке записи, в GUI передаём через сигнал
+        error = future.exception()
+        if error is not None:
+            self.recording_finished.emit('Запись не сохранена', str(error))
+            return
+        stats = future.result()
+        self.recording_finished.emit(
+            'Запись сохранена',
+            f'{path}\nкадров: {stats.written}, повторов: {stats.duplicates}, потеряно: {stats.dropped}',
+        )
 
-        data = buffer.data()[14:]
-        buffer.close()
+    def toggle_scroll_capture(self):
+        if self.scroll_capture:
+            stitcher = self.scroll_capture.stop()
+            self.scroll_capture = None
 
-        win32clipboard.OpenClipboard()
-        win32clipboard.EmptyClipboard()
-        win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
-        win32clipboard.CloseClipboard()
+            preset = EncodePreset.from_settings(self.settings.get_config())
+            folder = QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
+            file_name = 'scroll_' + QDateTime.currentDateTime().toString('yyyyMMdd_HHmmss') + preset.extension
+            # Картинка смотрит в memmap склейки: запись и удаление файла - одной задачей
+            self.output.run(stitcher.save, [FileSink(os.path.join(folder, file_name), preset)])
+            return
 
+        if not self.is_screening or not self.rect_drawer.current_rect:
+            return
+
+        region = self.frame.monitor_region(self.rect_drawer.current_rect)
+        if not region or not region['width'] or not region['height']:
+            return
+
+        from recorder import region_grabber
+        from scroll_capture import ScrollCapture
+
+        self.scroll_capture = ScrollCapture(region_grabber(self.capture, region), region['width'])
         self.close_screenshot()
-        self.show_screenshot_notification()
+        self.scroll_capture.start(OVERLAY_HIDE_DELAY)
+
+    def toggle_tracing(self):
+        if tracer.toggle():
+            logger.info('Трассировка включена')
+            return
+
+        tracer.log_summary()
+        folder = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, 'trace_' + QDateTime.currentDateTime().toString('yyyyMMdd_HHmmss') + '.json')
+        count = tracer.export_chrome_trace(path)
+        logger.info('Трассировка выключена, %d событий записано в %s', count, path)
+
+    def log_trace_summary(self):
+        if tracer.enabled:
+            tracer.log_summary()
 
     def change_action(self, action):
         self.action = action
+        if action != MouseAction.Select.value:
+            self.screenshot_label.update(self.magnifier.hide())
 
     def is_cursor_in_tools_panel(self, pos):
         """Проверяет, находится ли курсор в области панели инструментов"""
@@ -225,10 +591,10 @@ class ScreenshotApp(QMainWindow):
             case MouseAction.Select.value:
                 if self.rect_drawer.enable:
                     self.rect_drawer.mouse_press(event)
-                    self.update()
+                    self.screenshot_label.update()
             case MouseAction.Pencil.value:
-                self.current_path = QPainterPath()
-                self.current_path.moveTo(event.pos())
+                self.current_stroke = StrokeBuilder(event.pos())
+                self.live_layer.clear()
             case MouseAction.Line.value:
                 self.current_line = QPainterPath()
                 self.current_line.moveTo(event.pos())
@@ -236,96 +602,159 @@ class ScreenshotApp(QMainWindow):
             case MouseAction.Rectangle.value:
                 self.current_rect = QPainterPath()
                 self.rect_start = event.pos()
+            case MouseAction.Pixelate.value | MouseAction.Blur.value:
+                self.redact_start = event.pos()
+                self.redact_rect = QRect(event.pos(), event.pos())
 
     def mouseMoveEvent(self, event):
         match self.action:
             case MouseAction.Select.value:
                 if self.rect_drawer.enable:
                     self.rect_drawer.mouse_move(event)
-                    self.update()
+
+                # Лупа нужна, пока выделение выбирают или тянут за край
+                loupe = not self.rect_drawer.current_rect or bool(event.buttons() & Qt.LeftButton)
+                self.screenshot_label.update(self.magnifier.move(event.pos(), loupe))
 
                 if self.rect_drawer.current_rect:
                     # self.screenshot_label.tools_panel.show()
                     self.screenshot_label.tools_panel.move(QPoint(self.rect_drawer.current_rect.right(), self.rect_drawer.current_rect.bottom() - 680))
             case MouseAction.Pencil.value:
-                if self.current_path:
-                    self.current_path.lineTo(event.pos())
-                    self.update()
+                if self.current_stroke:
+                    segment = self.current_stroke.add(event.pos())
+                    if segment:
+                        # Рисуем только новый отрезок, стоимость кадра не растёт с длиной штриха
+                        segment_path = QPainterPath(segment[0])
+                        segment_path.lineTo(segment[1])
+                        self.update_damage(self.live_layer.paint_path(segment_path, self.draw_pen))
             case MouseAction.Line.value:
                 if self.current_line:
+                    old_bounds = self.current_line.boundingRect().toAlignedRect()
                     self.current_line = QPainterPath()
                     self.current_line.moveTo(self.line_start)
                     self.current_line.lineTo(event.pos())
-                    self.update()
+                    self.update_damage(old_bounds, self.current_line.boundingRect().toAlignedRect())
             case MouseAction.Rectangle.value:
                 if self.current_rect:
+                    old_bounds = self.current_rect.boundingRect().toAlignedRect()
                     self.current_rect = QPainterPath()
                     self.current_rect.addRect(self.rect_start.x(), self.rect_start.y(), event.pos().x() - self.rect_start.x(), event.pos().y() - self.rect_start.y())
-                    print(self.rect_start.x(), self.rect_start.y(), event.pos().x(), event.pos().y())
-                    self.update()
+                    self.update_damage(old_bounds, self.current_rect.boundingRect().toAlignedRect())
+            case MouseAction.Pixelate.value | MouseAction.Blur.value:
+                if self.redact_rect:
+                    old_rect = self.redact_rect
+                    self.redact_rect = QRect(self.redact_start, event.pos()).normalized()
+                    # Превью считается в фоне по прореженной выборке и приходит сигналом changed
+                    self.redactor.request_preview(self.action, self.redact_rect)
+                    self.update_damage(old_rect, self.redact_rect)
+
+    def wheelEvent(self, event):
+        # Колесо меняет увеличение лупы вдвое за шаг
+        if self.action != MouseAction.Select.value or not self.magnifier.visible:
+            return
+        old = self.magnifier.rect()
+        zoom = self.magnifier.zoom * 2 if event.angleDelta().y() > 0 else self.magnifier.zoom // 2
+        self.screenshot_label.update(old.united(self.magnifier.set_zoom(zoom)))
+
+    def update_damage(self, *rects):
+        # Перерисовываем только изменившуюся область с запасом на толщину пера
+        width = int(self.draw_pen.widthF()) + 2
+        damage = QRect()
+        for rect in rects:
+            damage = damage.united(rect.normalized().adjusted(-width, -width, width, width))
+        self.screenshot_label.update(damage)
 
     def mouseReleaseEvent(self, event):
         match self.action:
             case MouseAction.Select.value:
                 if self.rect_drawer.enable:
                     self.rect_drawer.mouse_release(event)
-                    self.update()
+                    self.screenshot_label.update()
 
                     if self.rect_drawer.current_rect:
                         self.screenshot_label.tools_panel.show()
                         self.screenshot_label.tools_panel.qpoint_panel = QPoint(self.rect_drawer.current_rect.right(), self.rect_drawer.current_rect.bottom() - 680)
                         self.screenshot_label.tools_panel.move(self.screenshot_label.tools_panel.qpoint_panel)
             case MouseAction.Pencil.value:
-                if self.current_path:
-                    self.finalize_drawing(self.current_path)
-                    # self.current_path = None
+                if self.current_stroke:
+                    path = self.current_stroke.path(smooth=self.smooth_strokes)
+                    self.finalize_drawing(MouseAction.Pencil.value, path)
+                    self.current_stroke = None
+                    self.live_layer.clear()
                 self.pencil_drawing = False
             case MouseAction.Line.value:
                 if self.current_line:
-                    self.finalize_drawing(self.current_line)
+                    self.finalize_drawing(MouseAction.Line.value, self.current_line)
+                    self.current_line = None
                 self.line_drawing = False
             case MouseAction.Rectangle.value:
                 if self.current_rect:
-                    self.finalize_drawing(self.current_rect)
-
-    def finalize_drawing(self, path):
-        if not self.drawing_buffer.size().isValid():
-            self.drawing_buffer = QPixmap(self.size())
-            self.drawing_buffer.fill(Qt.transparent)
-
-        temp = self.drawing_buffer.copy()
-        self.drawing_buffer = QPixmap(self.size())
-        self.drawing_buffer.fill(Qt.transparent)
+                    self.finalize_drawing(MouseAction.Rectangle.value, self.current_rect)
+                    self.current_rect = None
+            case MouseAction.Pixelate.value | MouseAction.Blur.value:
+                if self.redact_rect:
+                    rect = self.redact_rect
+                    self.redact_rect = None
+                    if rect.width() > 1 and rect.height() > 1:
+                        self.finalize_redaction(self.action, rect)
+                    else:
+                        self.update_damage(rect, self.redactor.cancel_preview())
+
+    @tracer.timed()
+    def finalize_drawing(self, kind, path):
+        # Фигура попадает в растр только при следующей отрисовке
+        # Перо не меняется на месте (при смене настроек создаётся новое), поэтому копия не нужна
+        bounds = self.annotations.add(Annotation(kind, path, self.draw_pen))
+        self.screenshot_label.update(bounds)
+
+    @tracer.timed()
+    def finalize_redaction(self, kind, rect):
+        # Пока полный расчёт идёт в фоне, на месте области лежит превью
+        preview = self.redactor.preview
+        item = self.redactor.apply(kind, rect)
+        self.update_damage(preview[0] if preview else rect, self.annotations.add(item))
+
+    def on_redacted(self, item):
+        self.screenshot_label.update(self.annotations.refresh(item))
+
+    def undo_annotation(self):
+        if not self.is_screening:
+            return
+        self.screenshot_label.update(self.annotations.undo())
 
-        buffer_painter = QPainter(self.drawing_buffer)
-        buffer_painter.drawPixmap(0, 0, temp)
-        buffer_painter.setPen(QPen(QColor(255, 0, 0), 3))
-        buffer_painter.drawPath(path)
-        buffer_painter.end()
+    def redo_annotation(self):
+        if not self.is_screening:
+            return
+        self.screenshot_label.update(self.annotations.redo())
 
-    def paintEvent(self, event):
+    def paint_overlay(self, painter, rect):
         if self.rect_drawer.enable:
-            super().paintEvent(event)
-            painter = QPainter(self)
             self.rect_drawer.paint(painter)
 
-        painter_drawing = QPainter(self)
-        if not self.drawing_buffer.isNull():
-            painter_drawing.drawPixmap(0, 0, self.drawing_buffer)
+        self.annotations.draw(painter, rect)
 
-        if self.current_path:
-            painter_drawing.setPen(QPen(QColor(255, 0, 0), 3))
-            painter_drawing.drawPath(self.current_path)
+        self.live_layer.draw(painter, rect)
+        self.paint_current_shapes(painter, rect)
+        self.magnifier.draw(painter, rect)
 
+    def paint_current_shapes(self, painter, rect):
         if self.current_line:
-            painter_drawing.setPen(QPen(QColor(255, 0, 0), 3))
-            painter_drawing.drawPath(self.current_line)
+            painter.setPen(self.draw_pen)
+            painter.drawPath(self.current_line)
 
         if self.current_rect:
-            painter_drawing.setPen(QPen(QColor(255, 0, 0), 3))
-            painter_drawing.drawPath(self.current_rect)
+            painter.setPen(self.draw_pen)
+            painter.drawPath(self.current_rect)
+
+        if self.redact_rect:
+            self.redactor.draw_preview(painter)
+            painter.setPen(self.render_style.redact_pen)
+            painter.drawRect(self.redact_rect)
 
     def show_screenshot_notification(self, is_cropped=False):
+        self.show_message("Скриншот сохранён в буфер!", "Область экрана скопирована.")
+
+    def show_message(self, title, text):
         tray = QSystemTrayIcon(self)
 
         # Установите иконку (если есть)
@@ -335,8 +764,8 @@ class ScreenshotApp(QMainWindow):
             tray.setIcon(QApplication.windowIcon())
         tray.show()
         tray.showMessage(
-            "Скриншот сохранён в буфер!",
-            "Область экрана скопирована.",
+            title,
+            text,
             QSystemTrayIcon.Information,
             3000  # 3 секунды
         )
@@ -346,6 +775,6 @@ class ScreenshotApp(QMainWindow):
 if __name__ == '__main__':
     app = QApplication(sys.argv)
 
+    # Приложение живёт в трее, оверлей показывается только на время снимка
     main_window = ScreenshotApp()
-    main_window.show()
     sys.exit(app.exec_())
@@ -1,18 +1,31 @@
+import time
+
 from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QPainter, QRegion
 from PyQt5.QtWidgets import QLabel, QVBoxLayout
 
+from instrumentation import FrameCounter, tracer
+from render_style import RenderStyle
 from tools_panel import PanelTools
 
 
 class ScreenShotCanvas(QLabel):
     tools_signal = pyqtSignal(str)
+    frame_shown = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        self.screenshot_image = None
+        self.frame = None
         self.is_screening = False
 
+        # Затемнение рисуется при отрисовке, отдельного затемнённого кадра нет
+        self.render_style = RenderStyle()
+        self.selection_source = None
+        self.layers = []
+        self.frame_counter = FrameCounter()
+        self.frame_pending = False
+
         self.tools_panel = PanelTools()
         self.tools_panel.change_action.connect(self.tools_signal.emit)
 
@@ -20,4 +33,50 @@ class ScreenShotCanvas(QLabel):
         layout.addWidget(self.tools_panel)
         self.setLayout(layout)
 
+    def set_frame(self, frame):
+        self.frame = frame
+        self.frame_pending = True
+        self.update()
+
+    def set_render_style(self, style):
+        self.render_style = style
+        if self.frame is not None:
+            self.update()
+
+    def clear(self):
+        self.frame = None
+        super().clear()
+
+    def selection(self):
+        if self.selection_source is None:
+            return None
+        return self.selection_source.get_selection()
+
+    def paintEvent(self, event):
+        if self.frame is None:
+            super().paintEvent(event)
+            return
+
+        start = time.perf_counter()
+        rect = event.rect()
+        painter = QPainter(self)
+        self.frame.draw(painter, rect)
+
+        dim_region = QRegion(rect)
+        selection = self.selection()
+        if selection:
+            dim_region = dim_region.subtracted(QRegion(selection.normalized()))
+        for dim_rect in dim_region.rects():
+            painter.fillRect(dim_rect, self.render_style.dim_brush)
+
+        for layer in self.layers:
+            layer(painter, rect)
+        painter.end()
+        elapsed = time.perf_counter() - start
+        self.frame_counter.add(elapsed, rect)
+        if tracer.enabled:
+            tracer.record('paintEvent', start, elapsed, {'pixels': rect.width() * rect.height()})
 
+        if self.frame_pending:
+            self.frame_pending = False
+            self.frame_shown.emit()
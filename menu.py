@@ -1,5 +1,7 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
 
+from settings import Settings
+
 
 class MainMenu(QWidget):
     def __init__(self):
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import multiprocessing
+import shutil
+import subprocess
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from instrumentation import tracer
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 64
+
+
+def recognize(gray, width, height, language):
+    """Выполняется в процессе-воркере: распознаёт 8-битную серую картинку без выравнивания строк."""
+    try:
+        import pytesseract
+        from PIL import Image
+    except ImportError:
+        pytesseract = None
+
+    if pytesseract is not None:
+        return pytesseract.image_to_string(Image.frombytes('L', (width, height), gray), lang=language)
+
+    # Без pytesseract - напрямую консольный tesseract, картинка идёт в stdin как PGM
+    executable = shutil.which('tesseract')
+    if executable is None:
+        raise FileNotFoundError('tesseract не найден в PATH')
+    pgm = b'P5\n%d %d\n255\n' % (width, height) + gray
+    result = subprocess.run(
+        [executable, 'stdin', 'stdout', '-l', language],
+        input=pgm, capture_output=True, check=True,
+    )
+    return result.stdout.decode('utf-8')
+
+
+def grayscale_bytes(image):
+    # Серый кадр вчетверо меньше RGB32 - дешевле передавать в другой процесс и хэшировать
+    gray = image.convertToFormat(QImage.Format_Grayscale8)
+    bits = gray.constBits()
+    bits.setsize(gray.sizeInBytes())
+    data = bytes(bits)
+    width, height, stride = gray.width(), gray.height(), gray.bytesPerLine()
+    if stride != width:
+        data = b''.join(data[row * stride:row * stride + width] for row in range(height))
+    return data, width, height
+
+
+class OcrService(QObject):
+    """Распознавание текста в пуле процессов с кэшем по хэшу картинки.
+
+    Результат приходит сигналом text_ready(текст, секунды) в потоке, где живёт сервис.
+    """
+
+    text_ready = pyqtSignal(str, float)
+    failed = pyqtSignal(str)
+    # Результат из служебного потока пула; кэш трогаем только в потоке сервиса
+    recognized = pyqtSignal(object, str, float)
+
+    def __init__(self, language='eng', cache_size=CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.language = language
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.executor = None
+        self.recognized.connect(self.finish)
+
+    def extract(self, image):
+        start = time.perf_counter()
+        gray, width, height = grayscale_bytes(image)
+        key = (self.language, width, height, hashlib.blake2b(gray, digest_size=16).hexdigest())
+
+        text = self.cache.get(key)
+        if text is not None:
+            self.cache.move_to_end(key)
+            self.finish(key, text, start, True)
+            return None
+
+        # Пул поднимается при первом распознавании, а не при старте приложения.
+        # spawn, а не fork: fork многопоточного процесса Qt с пулами потоков может зависнуть
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        future = self.executor.submit(recognize, gray, width, height, self.language)
+        future.add_done_callback(lambda done: self.on_done(done, key, start))
+        return future
+
+    def on_done(self, future, key, start):
+        # Колбэк вызывается в служебном потоке пула
+        try:
+            text = future.result()
+        except Exception as error:
+            logger.warning('OCR не удался: %s', error)
+            self.failed.emit(str(error))
+            return
+        self.recognized.emit(key, text, start)
+
+    def finish(self, key, text, start, cached=False):
+        self.cache[key] = text
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        seconds = time.perf_counter() - start
+        tracer.record('ocr', start, seconds, {'cached': cached, 'chars': len(text)})
+        logger.info('OCR: %d символов за %.1f мс%s', len(text), seconds * 1000, ' (из кэша)' if cached else '')
+        self.text_ready.emit(text, seconds)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
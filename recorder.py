@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 32
+ANIMATED_MEMORY_LIMIT = 512 * 2 ** 20  # байт несжатых RGB-кадров у AnimatedWriter
+
+
+class RecordedFrame:
+    def __init__(self, index, timestamp, pixels, changed, keyframe):
+        self.index = index
+        self.timestamp = timestamp
+        # pixels - массив (h, w, 4) BGRA, changed - маска изменившихся тайлов
+        self.pixels = pixels
+        self.changed = changed
+        self.keyframe = keyframe
+
+    def to_image(self, delta=False):
+        height, width = self.pixels.shape[:2]
+        pixels = self.pixels
+        if delta and not self.keyframe:
+            # Неизменившиеся тайлы делаем прозрачными, PNG сжимает их почти в ноль
+            mask = np.repeat(np.repeat(self.changed, TILE_SIZE, axis=0), TILE_SIZE, axis=1)[:height, :width]
+            pixels = pixels.copy()
+            pixels[..., 3] = np.where(mask, 255, 0)
+            pixels[~mask] = 0
+            image_format = QImage.Format_ARGB32
+        else:
+            image_format = QImage.Format_RGB32
+        pixels = np.ascontiguousarray(pixels)
+        return QImage(pixels.data, width, height, width * 4, image_format).copy()
+
+
+def changed_tiles(previous, current, tile=TILE_SIZE):
+    """Маска тайлов, в которых кадр отличается от предыдущего."""
+    height, width = current.shape[:2]
+    rows = -(-height // tile)
+    cols = -(-width // tile)
+    diff = np.any(previous != current, axis=2)
+    padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+    padded[:height, :width] = diff
+    return padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+
+class FrameDirectoryWriter:
+    """Пишет ключевые кадры целиком, а промежуточные - только изменившимися тайлами."""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest = []
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, frame):
+        name = f'frame_{frame.index:06d}.png'
+        frame.to_image(delta=True).save(os.path.join(self.path, name), 'PNG')
+        self.manifest.append({
+            'file': name,
+            'timestamp': frame.timestamp,
+            'keyframe': frame.keyframe,
+        })
+
+    def close(self, durations):
+        for entry, duration in zip(self.manifest, durations):
+            entry['duration'] = duration
+        with open(os.path.join(self.path, 'manifest.json'), 'w') as manifest:
+            json.dump({'tile_size': TILE_SIZE, 'frames': self.manifest}, manifest, indent=2)
+
+
+class AnimatedWriter:
+    """Анимированный PNG или WebP через Pillow; кадры копятся в памяти до остановки записи.
+
+    Pillow собирает анимацию только из всех кадров сразу (и APNG, и WebP держат их при
+    сохранении), поэтому запись ограничена memory_limit байт RGB-кадров: при 1920x1080 это
+    около 86 кадров, при 800x600 - около 370. Кадры сверх лимита отбрасываются с предупреждением;
+    для длинных записей есть FrameDirectoryWriter.
+    """
+
+    def __init__(self, path, memory_limit=ANIMATED_MEMORY_LIMIT):
+        self.path = path
+        self.memory_limit = memory_limit
+        self.images = []
+        self.nbytes = 0
+        self.skipped = 0
+
+    def write(self, frame):
+        from PIL import Image
+
+        height, width = frame.pixels.shape[:2]
+        if self.nbytes + width * height * 3 > self.memory_limit:
+            if not self.skipped:
+                logger.warning('Анимация достигла лимита %d МБ, остальные кадры не пишутся', self.memory_limit // 2 ** 20)
+            self.skipped += 1
+            return
+        self.images.append(Image.frombuffer('RGBA', (width, height), frame.pixels.tobytes(), 'raw', 'BGRA', 0, 1).convert('RGB'))
+        self.nbytes += width * height * 3
+
+    def close(self, durations):
+        if not self.images:
+            return
+        first, *rest = self.images
+        # Длительности приходят на все кадры записи, отброшенные по лимиту в файл не попали
+        durations = durations[:len(self.images)]
+        first.save(
+            self.path,
+            save_all=True,
+            append_images=rest,
+            duration=[max(1, round(duration * 1000)) for duration in durations],
+            loop=0,
+            lossless=True,
+        )
+
+
+class RecorderStats:
+    def __init__(self):
+        self.captured = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.written = 0
+        self.tiles_total = 0
+        self.tiles_changed = 0
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class RegionRecorder:
+    """Запись области экрана: захват в одном потоке, кодирование в другом, между ними ограниченная очередь."""
+
+    def __init__(self, grab, writer, fps=10, queue_size=32, keyframe_interval=50):
+        # grab() возвращает numpy-массив (h, w, 4) BGRA и вызывается из потока захвата
+        self.grab = grab
+        self.writer = writer
+        self.interval = 1 / fps
+        self.keyframe_interval = keyframe_interval
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.stats = RecorderStats()
+        self.timestamps = []
+        self.elapsed = 0.0
+
+        self._stop = threading.Event()
+        self._capture_thread = threading.Thread(target=self.capture_loop, name='record-capture', daemon=True)
+        self._encode_thread = threading.Thread(target=self.encode_loop, name='record-encode', daemon=True)
+        self.delay = 0.0
+
+    def start(self, delay=0.0):
+        # delay - пауза перед первым кадром, пока с экрана уходит оверлей
+        self.delay = delay
+        self._capture_thread.start()
+        self._encode_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._capture_thread.join()
+        self.frames.put(None)
+        self._encode_thread.join()
+        self.writer.close(self.durations())
+        logger.info('Запись остановлена: %s', self.stats.as_dict())
+        return self.stats
+
+    def capture_loop(self):
+        if self._stop.wait(self.delay):
+            return
+        previous = None
+        index = 0
+        since_keyframe = 0
+        started = time.perf_counter()
+        next_time = started
+
+        while not self._stop.is_set():
+            pixels = self.grab()
+            timestamp = time.perf_counter() - started
+            self.stats.captured += 1
+
+            keyframe = previous is None or since_keyframe >= self.keyframe_interval
+            if keyframe:
+                changed = np.ones((1, 1), dtype=bool)
+            else:
+                changed = changed_tiles(previous, pixels)
+                self.stats.tiles_total += changed.size
+                self.stats.tiles_changed += int(changed.sum())
+
+            if not keyframe and not changed.any():
+                # Кадр не изменился - просто продлеваем предыдущий
+                self.stats.duplicates += 1
+            else:
+                frame = RecordedFrame(index, timestamp, pixels, changed, keyframe)
+                try:
+                    self.frames.put_nowait(frame)
+                except queue.Full:
+                    # Диск не успевает - теряем кадр, но не тормозим захват
+                    self.stats.dropped += 1
+                else:
+                    self.timestamps.append(timestamp)
+                    index += 1
+                    since_keyframe = 0 if keyframe else since_keyframe + 1
+                    previous = pixels
+
+            self.elapsed = time.perf_counter() - started
+            next_time += self.interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_time = time.perf_counter()
+
+    def durations(self):
+        # Повторы не пишутся, их время достаётся предыдущему кадру
+        ends = self.timestamps[1:] + [max(self.elapsed, self.timestamps[-1] if self.timestamps else 0.0)]
+        return [end - start for start, end in zip(self.timestamps, ends)]
+
+    def encode_loop(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                return
+            try:
+                self.writer.write(frame)
+                self.stats.written += 1
+            except Exception:
+                logger.exception('Ошибка записи кадра %d', frame.index)
+
+
+def region_grabber(session, region):
+    """Функция захвата для RegionRecorder на основе CaptureSession."""
+
+    def grab():
+        frame = session.grabber().grab(region)
+        return np.frombuffer(frame.raw, dtype=np.uint8).reshape(frame.height, frame.width, 4)
+
+    return grab
@@ -1,6 +1,13 @@
 from PyQt5.QtCore import QRect, QPoint
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor
+from PyQt5.QtGui import QColor, QPen
+
+OPPOSITE_CORNERS = {
+    'top_left': QRect.bottomRight,
+    'top_right': QRect.bottomLeft,
+    'bottom_left': QRect.topRight,
+    'bottom_right': QRect.topLeft,
+}
 
 
 class RectangleDrawer:
@@ -17,6 +24,15 @@ class RectangleDrawer:
         self.resize_side = None
 
         self.margin = 8 # pixels
+        self.pen = QPen(QColor(220, 190, 230, 120))
+        self.suggestion_pen = QPen(QColor(220, 190, 230, 200), 1, Qt.DashLine)
+
+        # Прилипание к краям: индекс краёв строится в фоне, пока его нет - обычное выделение
+        self.snap_enabled = True
+        self.snap_radius = 8
+        self.snap_active = True
+        self.edge_index_future = None
+        self.suggestion = None
 
         self.widget.setMouseTracking(True)
         self.enable = True
@@ -32,6 +48,29 @@ class RectangleDrawer:
         self.resize_side = None
 
         self.margin = 8  # pixels
+        if self.edge_index_future is not None:
+            self.edge_index_future.cancel()
+        self.edge_index_future = None
+        self.suggestion = None
+
+    def set_edge_index(self, future):
+        self.edge_index_future = future
+
+    def edge_index(self):
+        future = self.edge_index_future
+        if not self.snap_active or future is None or not future.done() or future.exception():
+            return None
+        return future.result()
+
+    def snap_point(self, pos, anchor):
+        # Угол, который тянут, прилипает к линиям, идущим от него к опорному углу
+        index = self.edge_index()
+        if index is None:
+            return pos
+        return QPoint(
+            index.snap_x(pos.x(), anchor.y(), pos.y(), self.snap_radius),
+            index.snap_y(pos.y(), anchor.x(), pos.x(), self.snap_radius),
+        )
 
     def get_resize_side(self, pos):
         rect = self.current_rect
@@ -78,8 +117,8 @@ class RectangleDrawer:
                     self.drag_offset = event.pos() - self.current_rect.topLeft()
                     self.moving_rect = True
             else:
-                self.start_pos = event.pos()
-                self.end_pos = event.pos()
+                self.start_pos = self.snap_point(event.pos(), event.pos())
+                self.end_pos = self.start_pos
                 self.dragging = True
                 self.current_rect = QRect(self.start_pos, self.end_pos)
 
@@ -88,15 +127,18 @@ class RectangleDrawer:
             self.widget.update()
 
     def mouse_move(self, event):
+        old_rect = QRect(self.current_rect) if self.current_rect else None
+        # Alt временно отключает прилипание
+        self.snap_active = self.snap_enabled and not event.modifiers() & Qt.AltModifier
+
         if self.dragging:
-            self.end_pos = event.pos()
+            self.end_pos = self.snap_point(event.pos(), self.start_pos)
             self.current_rect = QRect(
                 min(self.start_pos.x(), self.end_pos.x()),
                 min(self.start_pos.y(), self.end_pos.y()),
                 abs(self.start_pos.x() - self.end_pos.x()),
                 abs(self.start_pos.y() - self.end_pos.y())
             )
-            self.widget.update()
         elif self.moving_rect and self.current_rect:
             new_pos = event.pos() - self.drag_offset
             screen_rect = self.widget.rect()
@@ -104,14 +146,59 @@ class RectangleDrawer:
             new_pos.setY(max(0, min(new_pos.y(), screen_rect.height() - self.current_rect.height())))
 
             self.current_rect.moveTo(new_pos)
-            self.widget.update()
         elif self.resizing and self.resize_side:
             self.resize_rect(event.pos())
+        elif not self.current_rect:
+            return self.suggest(event.pos())
+        else:
+            return QRect()
+
+        damage = self.damage_rect(old_rect, self.current_rect)
+        self.widget.update(damage)
+        return damage
+
+    def suggest(self, pos):
+        # Подсказка: прямоугольник из линий вокруг курсора, клик выбирает его
+        index = self.edge_index()
+        suggestion = index.region_at(pos) if index else None
+        if suggestion == self.suggestion:
+            return QRect()
+        damage = self.damage_rect(self.suggestion, suggestion)
+        self.suggestion = suggestion
+        self.widget.update(damage)
+        return damage
+
+    def bounds(self, rect):
+        # Рамка выделения вместе с зонами захвата по краям
+        if rect is None:
+            return QRect()
+        return rect.normalized().adjusted(-self.margin - 1, -self.margin - 1, self.margin + 1, self.margin + 1)
+
+    def damage_rect(self, old_rect, new_rect):
+        return self.bounds(old_rect).united(self.bounds(new_rect))
 
     def resize_rect(self, pos):
         old = self.current_rect
         new = QRect(old)
 
+        # Сторона прилипает к линии вдоль всей стороны, угол - к линиям от противоположного угла
+        index = self.edge_index()
+        if index is not None:
+            # Край k проходит перед пикселем k, а правая и нижняя границы QRect включают
+            # свой пиксель: для них ищем край после курсора и берём k-1, как region_at
+            dx = 1 if self.resize_side in ('right', 'top_right', 'bottom_right') else 0
+            dy = 1 if self.resize_side in ('bottom', 'bottom_left', 'bottom_right') else 0
+            x, y = pos.x(), pos.y()
+            if self.resize_side in ('top', 'bottom'):
+                y = index.snap_y(pos.y() + dy, old.left(), old.right(), self.snap_radius) - dy
+            elif self.resize_side in ('left', 'right'):
+                x = index.snap_x(pos.x() + dx, old.top(), old.bottom(), self.snap_radius) - dx
+            else:
+                anchor = OPPOSITE_CORNERS[self.resize_side](old)
+                x = index.snap_x(pos.x() + dx, anchor.y(), pos.y(), self.snap_radius) - dx
+                y = index.snap_y(pos.y() + dy, anchor.x(), pos.x(), self.snap_radius) - dy
+            pos = QPoint(x, y)
+
         match self.resize_side:
             case 'top':
                 new_y = pos.y()
@@ -191,13 +278,24 @@ class RectangleDrawer:
 
     def mouse_release(self, event):
         if event.button() == Qt.LeftButton:
+            # Клик без перетаскивания выбирает подсказанную область
+            if self.dragging and self.start_pos == self.end_pos and self.suggestion:
+                self.current_rect = QRect(self.suggestion)
+            if self.dragging:
+                self.widget.update(self.bounds(self.suggestion))
+                self.suggestion = None
             self.dragging = False
             self.moving_rect = False
 
     def paint(self, painter):
+        if self.suggestion and not self.current_rect:
+            painter.setPen(self.suggestion_pen)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(self.suggestion)
+
         if self.current_rect:
-            painter.setPen(QColor(220, 190, 230, 120))
-            painter.setBrush(QColor(220, 190, 230, 120))
+            painter.setPen(self.pen)
+            painter.setBrush(Qt.NoBrush)
             painter.drawRect(self.current_rect)
 
 
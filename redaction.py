@@ -0,0 +1,297 @@
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt5.QtCore import Qt, QObject, QRect, QRectF, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from instrumentation import tracer
+
+logger = logging.getLogger(__name__)
+
+PIXELATE_BLOCK = 12  # сторона квадрата пикселизации в логических пикселях
+BLUR_RADIUS = 8  # сигма размытия в логических пикселях
+PREVIEW_PIXELS = 250000  # превью при перетаскивании считается не больше чем по стольким пикселям
+BLUR_PASSES = 3  # три box-прохода дают почти гауссово ядро
+BLUR_MIN_SIGMA = 2  # сильное размытие считается на уменьшенной копии, где сигма не меньше этой
+
+
+def block_means(pixels, block):
+    """Среднее по квадратам block x block; у края область дополняется крайними пикселями."""
+    height, width, channels = pixels.shape
+    rows, cols = -(-height // block), -(-width // block)
+    if rows * block != height or cols * block != width:
+        pixels = np.pad(pixels, ((0, rows * block - height), (0, cols * block - width), (0, 0)), mode='edge')
+    # Сумма block срезов с шагом block по каждой оси - один проход по памяти без временных осей
+    sums = pixels[0::block].astype(np.uint32)
+    for offset in range(1, block):
+        sums += pixels[offset::block]
+    columns = sums[:, 0::block].copy()
+    for offset in range(1, block):
+        columns += sums[:, offset::block]
+    sums = columns
+    return ((sums + block * block // 2) // (block * block)).astype(np.uint8)
+
+
+def to_image(pixels):
+    """Непрозрачный QImage из BGR(A)-массива; copy() отвязывает картинку от памяти numpy."""
+    height, width = pixels.shape[:2]
+    bgra = np.empty((height, width, 4), dtype=np.uint8)
+    bgra[..., :3] = pixels[..., :3]
+    bgra[..., 3] = 255
+    return QImage(bgra.data, width, height, width * 4, QImage.Format_RGB32).copy()
+
+
+def enlarge(pixels, factor, width, height, mode):
+    # Увеличение делает Qt: в C++ это на порядок быстрее, чем np.repeat или интерполяция в numpy
+    image = to_image(pixels)
+    if factor == 1:
+        return image
+    rows, cols = pixels.shape[:2]
+    return image.scaled(cols * factor, rows * factor, Qt.IgnoreAspectRatio, mode).copy(0, 0, width, height)
+
+
+def pixelate(pixels, block):
+    block = max(1, int(block))
+    height, width = pixels.shape[:2]
+    return enlarge(block_means(pixels[..., :3], block), block, width, height, Qt.FastTransformation)
+
+
+def box_sizes(sigma, passes=BLUR_PASSES):
+    # Ширины box-фильтров, чьё последовательное применение близко к гауссу с этой сигмой
+    ideal = math.sqrt(12 * sigma * sigma / passes + 1)
+    lower = int(ideal) - (int(ideal) % 2 == 0)
+    upper = lower + 2
+    count = round((12 * sigma * sigma - passes * lower * lower - 4 * passes * lower - 3 * passes) / (-4 * lower - 4))
+    return [lower if index < count else upper for index in range(passes)]
+
+
+def box_blur(values, size, axis):
+    """Скользящее среднее шириной size вдоль axis через префиксные суммы, край продолжается."""
+    radius = size // 2
+    if radius < 1:
+        return values
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (radius + 1, radius)
+    prefix = np.cumsum(np.pad(values, pad, mode='edge'), axis=axis, dtype=np.int32)
+    count = values.shape[axis]
+    upper = [slice(None)] * values.ndim
+    lower = [slice(None)] * values.ndim
+    upper[axis] = slice(size, size + count)
+    lower[axis] = slice(0, count)
+    return (prefix[tuple(upper)] - prefix[tuple(lower)] + radius) // size
+
+
+def blur(pixels, sigma):
+    """Приближение гауссова размытия: несколько box-проходов по строкам и столбцам."""
+    height, width = pixels.shape[:2]
+    if sigma < 0.5:
+        return to_image(pixels)
+
+    # После гаусса с большой сигмой мелких деталей нет, поэтому считаем на уменьшенной
+    # копии и билинейно растягиваем обратно - результат в полном разрешении, в factor^2 раз дешевле
+    factor = max(1, int(sigma // BLUR_MIN_SIGMA))
+    color = block_means(pixels[..., :3], factor) if factor > 1 else pixels[..., :3]
+
+    values = color.astype(np.int32)
+    for size in box_sizes(sigma / factor):
+        values = box_blur(values, size, axis=1)
+        values = box_blur(values, size, axis=0)
+    return enlarge(values.astype(np.uint8), factor, width, height, Qt.SmoothTransformation)
+
+
+FILTERS = {
+    'pixelate': pixelate,
+    'blur': blur,
+}
+
+
+def region_pixels(capture, rect, step=1):
+    """BGRA-пиксели области в физическом разрешении, с шагом step. Возвращает (пиксели, scale)."""
+    frames = capture.intersecting(rect)
+    if len(frames) == 1 and frames[0].geometry.contains(rect):
+        # Выделение на одном мониторе: срез прямо из буфера кадра, без копии
+        frame = frames[0]
+        source = frame.source_rect(rect).toAlignedRect().intersected(QRect(0, 0, frame.width, frame.height))
+        buffer = np.frombuffer(frame.raw, dtype=np.uint8).reshape(frame.height, frame.width, 4)
+        return buffer[source.top():source.bottom() + 1:step, source.left():source.right() + 1:step], frame.scale
+
+    image = capture.crop(rect)
+    scale = image.devicePixelRatio()
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    buffer = np.frombuffer(bits, dtype=np.uint8).reshape(image.height(), image.bytesPerLine() // 4, 4)
+    # Копия: память принадлежит временному QImage
+    return buffer[::step, :image.width():step].copy(), scale
+
+
+def solid_image(color=Qt.black):
+    image = QImage(1, 1, QImage.Format_RGB32)
+    image.fill(color)
+    return image
+
+
+def redact(capture, rect, kind, strength, max_pixels=None):
+    """Фильтрует область снимка. Если задан max_pixels, считает по прореженной выборке (превью)."""
+    rect = rect.normalized().intersected(capture.rect())
+    if rect.isEmpty():
+        return QImage()
+
+    step = 1
+    if max_pixels:
+        frame = capture.frame_at(rect.center())
+        scale = frame.scale if frame else 1.0
+        step = max(1, math.ceil(math.sqrt(rect.width() * rect.height() * scale * scale / max_pixels)))
+
+    with tracer.span('redact.' + kind, step=step, width=rect.width(), height=rect.height()):
+        pixels, scale = region_pixels(capture, rect, step)
+        # Сила задаётся в логических пикселях, фильтр работает по физическим пикселям выборки
+        return FILTERS[kind](pixels, strength * scale / step)
+
+
+class Redaction:
+    """Закрашенная фильтром область: в экспорт попадают уже изменённые пиксели, не исходные."""
+
+    def __init__(self, kind, rect, image=None):
+        self.kind = kind
+        self.rect = rect
+        self.image = image
+        self.final = False
+
+    def bounds(self, layer):
+        return QRect(self.rect)
+
+    def paint(self, painter):
+        painter.drawImage(QRectF(self.rect), self.covering())
+
+    def rasterize(self, layer, keys=None):
+        layer.paint_image(self.rect, self.covering(), keys)
+
+    def covering(self):
+        # Нет результата (ещё не было превью или фильтр упал) - область просто закрашивается
+        if self.image is None or self.image.isNull():
+            return solid_image()
+        return self.image
+
+
+class Redactor(QObject):
+    """Считает фильтры в рабочем потоке.
+
+    Пока тянут рамку - превью по прореженной выборке, не больше одного расчёта за раз
+    (лишние запросы схлопываются в последний). После отпускания - полное разрешение;
+    результат подставляется в Redaction сигналом redacted в потоке, где живёт Redactor.
+    """
+
+    changed = pyqtSignal(QRect)
+    redacted = pyqtSignal(object)
+    # Результаты из рабочего потока
+    preview_done = pyqtSignal(object, object)
+    final_done = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.strength = {'pixelate': PIXELATE_BLOCK, 'blur': BLUR_RADIUS}
+        self.executor = None
+        self.capture = None
+
+        self.requested = None
+        self.preview_job = None
+        self.preview = None
+        self.pending = {}
+
+        self.preview_done.connect(self.on_preview)
+        self.final_done.connect(self.finish)
+
+    def submit(self, function, *args):
+        # Поток поднимается при первом использовании инструмента
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='redact')
+        return self.executor.submit(function, *args)
+
+    def set_capture(self, capture):
+        self.clear()
+        self.capture = capture
+
+    def request_preview(self, kind, rect):
+        if self.capture is None:
+            return
+        self.requested = (kind, rect.normalized().intersected(self.capture.rect()))
+        if self.preview_job is None:
+            self.start_preview()
+
+    def start_preview(self):
+        kind, rect = self.preview_job = self.requested
+        future = self.submit(redact, self.capture, rect, kind, self.strength[kind], PREVIEW_PIXELS)
+        future.add_done_callback(lambda done, job=self.preview_job: self.on_done(done, self.preview_done, job))
+
+    def on_done(self, future, signal, job):
+        # Колбэк вызывается в рабочем потоке
+        if future.cancelled():
+            return
+        try:
+            image = future.result()
+        except Exception:
+            logger.exception('Не удалось применить фильтр')
+            image = solid_image()
+        signal.emit(job, image)
+
+    def on_preview(self, job, image):
+        if job is not self.preview_job:
+            return
+        self.preview_job = None
+        damage = self.preview[0] if self.preview else QRect()
+        self.preview = (job[1], image)
+        self.changed.emit(damage.united(job[1]))
+        if self.requested is not None and self.requested is not job:
+            self.start_preview()
+
+    def apply(self, kind, rect):
+        """Завершает рамку: возвращает Redaction с превью, полный расчёт уходит в поток."""
+        rect = rect.normalized().intersected(self.capture.rect()) if self.capture else rect.normalized()
+        image = self.preview[1] if self.preview else None
+        self.cancel_preview()
+        item = Redaction(kind, rect, image)
+        if self.capture is not None:
+            future = self.submit(redact, self.capture, rect, kind, self.strength[kind])
+            self.pending[item] = future
+            future.add_done_callback(lambda done: self.on_done(done, self.final_done, item))
+        return item
+
+    def finish(self, item, image):
+        future = self.pending.pop(item, None)
+        if future is None or item.final:
+            return
+        item.image = image
+        item.final = True
+        self.redacted.emit(item)
+
+    def wait(self):
+        """Дожидается полных расчётов - перед экспортом, чтобы в файл не ушло превью."""
+        for item, future in list(self.pending.items()):
+            if future.cancelled():
+                continue
+            try:
+                image = future.result()
+            except Exception:
+                logger.exception('Не удалось применить фильтр')
+                image = solid_image()
+            self.finish(item, image)
+
+    def cancel_preview(self):
+        damage = self.preview[0] if self.preview else QRect()
+        self.requested = None
+        self.preview_job = None
+        self.preview = None
+        return damage
+
+    def clear(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.capture = None
+        return self.cancel_preview()
+
+    def draw_preview(self, painter):
+        if self.preview is not None and not self.preview[1].isNull():
+            painter.drawImage(QRectF(self.preview[0]), self.preview[1])
@@ -0,0 +1,26 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QPen, QBrush
+
+
+def parse_color(value):
+    # В settings.ini цвет пишется как в CSS, решётка необязательна: f00, ff0000
+    color = QColor(value if value.startswith('#') else '#' + value)
+    if not color.isValid():
+        raise ValueError(f'Неверный цвет: {value}')
+    return color
+
+
+class RenderStyle:
+    """Перья, кисти и цвета оверлея. Собираются один раз на изменение настроек, а не на каждую отрисовку."""
+
+    def __init__(self, draw_color='f00', line_size=3, background_opacity=150):
+        self.draw_color = parse_color(draw_color)
+        self.draw_pen = QPen(self.draw_color, line_size)
+        # Рамка пикселизации/размытия, пока её тянут
+        self.redact_pen = QPen(self.draw_color, 1, Qt.DashLine)
+        self.dim_color = QColor(0, 0, 0, max(0, min(255, background_opacity)))
+        self.dim_brush = QBrush(self.dim_color)
+
+    @classmethod
+    def from_settings(cls, config):
+        return cls(config.draw_color, config.line_size, config.background_opacity)
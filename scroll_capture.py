@@ -0,0 +1,182 @@
+import glob
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+logger = logging.getLogger(__name__)
+
+COLUMN_STEP = 4  # для хэша строки берём каждый четвёртый пиксель
+MATCH_RATIO = 0.95
+MAX_MISSES = 3
+CANVAS_PREFIX = 'scroll_'
+CANVAS_SUFFIX = '.raw'
+
+
+def row_hashes(pixels, step=COLUMN_STEP):
+    """Полиномиальный хэш каждой строки по прореженным столбцам, без циклов по пикселям."""
+    sampled = pixels.view(np.uint32).reshape(pixels.shape[0], -1)[:, ::step].astype(np.uint64)
+    weights = np.arange(1, sampled.shape[1] + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return (sampled * weights).sum(axis=1, dtype=np.uint64)
+
+
+def find_scroll(previous, current, match_ratio=MATCH_RATIO):
+    """На сколько строк прокрутилось содержимое: previous[shift:] совпадает с current[:-shift].
+
+    Возвращает 0, если кадр не сдвинулся, и None, если перекрытие не найдено.
+    """
+    height = len(current)
+    if np.array_equal(previous, current):
+        return 0
+
+    # Якорь - первая строка текущего кадра, которая в нём не повторяется (не фон)
+    values, first_index, counts = np.unique(current, return_index=True, return_counts=True)
+    unique_rows = first_index[counts == 1]
+    anchor = int(unique_rows.min()) if len(unique_rows) else 0
+    candidates = np.nonzero(previous == current[anchor])[0] - anchor
+    candidates = candidates[(candidates > 0) & (candidates < height)]
+
+    best_shift = None
+    best_ratio = match_ratio
+    for shift in candidates:
+        overlap = height - shift
+        ratio = np.count_nonzero(previous[shift:] == current[:overlap]) / overlap
+        if ratio > best_ratio:
+            best_shift, best_ratio = int(shift), ratio
+    return best_shift
+
+
+class ScrollStitcher:
+    """Склеивает кадры прокрутки в холст на memmap, чтобы длинные страницы не держать в памяти."""
+
+    def __init__(self, width, path=None, initial_rows=4096):
+        self.width = width
+        if path is None:
+            # Дескриптор mkstemp закрываем сразу: файл открывает memmap, а открытый
+            # дескриптор на Windows не даёт удалить файл в close()
+            descriptor, path = tempfile.mkstemp(prefix=CANVAS_PREFIX, suffix=CANVAS_SUFFIX)
+            os.close(descriptor)
+        self.path = path
+        self.capacity = 0
+        self.height = 0
+        self.canvas = None
+        self.previous = None
+        self.skipped = 0
+        self.misses = 0
+        self.grow(initial_rows)
+
+    def grow(self, rows):
+        self.capacity = max(rows, self.capacity * 2)
+        if self.canvas is not None:
+            self.canvas.flush()
+            del self.canvas
+        with open(self.path, 'ab') as canvas_file:
+            canvas_file.truncate(self.capacity * self.width * 4)
+        self.canvas = np.memmap(self.path, dtype=np.uint8, mode='r+', shape=(self.capacity, self.width, 4))
+
+    def append(self, rows):
+        if self.height + len(rows) > self.capacity:
+            self.grow(self.height + len(rows))
+        self.canvas[self.height:self.height + len(rows)] = rows
+        self.height += len(rows)
+
+    def add(self, pixels):
+        hashes = row_hashes(pixels)
+        if self.previous is None:
+            self.append(pixels)
+            self.previous = hashes
+            return len(pixels)
+
+        shift = find_scroll(self.previous, hashes)
+        if shift == 0:
+            self.skipped += 1
+            return 0
+
+        if shift is None:
+            # Перекрытие не нашлось (прокрутили слишком далеко или одинаковый фон).
+            # Несколько раз ждём, потом добавляем кадр целиком, чтобы не застрять
+            self.misses += 1
+            self.skipped += 1
+            if self.misses <= MAX_MISSES:
+                return 0
+            shift = len(pixels)
+
+        self.misses = 0
+        self.append(pixels[len(pixels) - shift:])
+        self.previous = hashes
+        return shift
+
+    def to_image(self):
+        # QImage смотрит прямо в memmap, поэтому склейку закрываем только после записи картинки
+        rows = self.canvas[:self.height]
+        return QImage(rows.data, self.width, self.height, self.width * 4, QImage.Format_RGB32)
+
+    def save(self, sinks):
+        """Пишет склейку в получатели и удаляет файл.
+
+        QImage смотрит в memmap, и пока он жив, файл открыт (на Windows его не удалить),
+        поэтому картинка существует только внутри этого вызова.
+        """
+        from sinks import SinkWorker
+
+        try:
+            image = self.to_image()
+            SinkWorker.write_all(image, sinks)
+            del image
+        finally:
+            self.close()
+
+    def close(self):
+        if self.canvas is not None:
+            del self.canvas
+            self.canvas = None
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as error:
+            # Файл ещё открыт - его уберёт remove_stale_canvases при следующем запуске
+            logger.warning('Не удалось удалить %s: %s', self.path, error)
+
+
+def remove_stale_canvases(folder=None):
+    """Удаляет склейки, оставшиеся от прошлых запусков (упавших или не сумевших удалить файл)."""
+    folder = folder or tempfile.gettempdir()
+    for path in glob.glob(os.path.join(folder, CANVAS_PREFIX + '*' + CANVAS_SUFFIX)):
+        try:
+            os.remove(path)
+        except OSError as error:
+            logger.warning('Не удалось удалить %s: %s', path, error)
+
+
+class ScrollCapture:
+    """Повторно снимает область, пока пользователь прокручивает страницу, и склеивает кадры."""
+
+    def __init__(self, grab, width, interval=0.15):
+        self.grab = grab
+        self.interval = interval
+        self.stitcher = ScrollStitcher(width)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.capture_loop, name='scroll-capture', daemon=True)
+        self.delay = 0.0
+
+    def start(self, delay=0.0):
+        # delay - пауза перед первым кадром, пока с экрана уходит оверлей
+        self.delay = delay
+        self._thread.start()
+
+    def stop(self):
+        # Картинку не возвращаем: её пишет stitcher.save(), после чего файл склейки удаляется
+        self._stop.set()
+        self._thread.join()
+        logger.info('Прокрутка склеена: %d строк, пропущено кадров %d', self.stitcher.height, self.stitcher.skipped)
+        return self.stitcher
+
+    def capture_loop(self):
+        if self._stop.wait(self.delay):
+            return
+        while not self._stop.is_set():
+            self.stitcher.add(self.grab())
+            self._stop.wait(self.interval)
@@ -1,25 +1,59 @@
-from configparser import ConfigParser
+from configparser import ConfigParser, Error as ConfigError
+import logging
 import os
-from pydantic import BaseModel
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_PATH = 'settings.ini'
+IMAGE_FORMATS = ('png', 'jpeg', 'webp')
 
 
 class SettingModel(BaseModel):
     draw_color: str = "f00"
     line_size: int = 3
     background_opacity: int = 150
+    image_format: str = "png"
+    # Границы числовых полей: значение вне их отклоняется при чтении файла целиком,
+    # а не роняет отрисовку или вытеснение истории позже
+    png_compression: int = Field(6, ge=0, le=9)
+    jpeg_quality: int = Field(90, ge=1, le=100)
+    history_size: int = Field(20, ge=1)
+    history_memory_mb: int = Field(256, ge=0)
+    history_disk_mb: int = Field(1024, ge=0)
+    ocr_language: str = "eng"
+    snap_enabled: bool = True
+    snap_radius: int = Field(8, ge=0, le=64)
+    magnifier_enabled: bool = True
+    magnifier_zoom: int = Field(8, ge=1, le=32)
+    pixelate_block: int = Field(12, ge=1, le=256)
+    blur_radius: int = Field(8, ge=0, le=256)
+
+    @field_validator('image_format')
+    @classmethod
+    def check_image_format(cls, value):
+        # Неизвестный формат отклоняется при чтении файла, а не при сохранении снимка
+        value = value.lower()
+        if value not in IMAGE_FORMATS:
+            raise ValueError(f'image_format должен быть одним из {", ".join(IMAGE_FORMATS)}')
+        return value
 
 
 class Settings:
-    def __init__(self):
+    def __init__(self, config_path=SETTINGS_PATH):
+        self.config_path = config_path
         self._config_ini = ConfigParser()
-        self.read_settings('settings.ini')
+        self.read_settings(config_path)
 
         self._config_dict = dict(self._config_ini['Settings'])
-        self.config = SettingModel(
-            draw_color=self._config_dict['draw_color'],
-            line_size=self._config_dict['line_size'],
-            background_opacity=self._config_dict['background_opacity'],
-        )
+        # Ключи, которых ещё нет в старом settings.ini, берутся по умолчанию
+        try:
+            self.config = SettingModel(**self._config_dict)
+        except ValidationError as error:
+            logger.warning('settings.ini не применён, используются значения по умолчанию: %s', error)
+            self.config = SettingModel()
 
     def read_settings(self, config_path):
         if not os.path.exists(config_path):
@@ -27,6 +61,21 @@ class Settings:
 
         self._config_ini.read(config_path)
 
+    def reload(self):
+        """Перечитывает файл; при ошибке в нём остаются прежние настройки."""
+        config_ini = ConfigParser()
+        try:
+            config_ini.read(self.config_path)
+            config = SettingModel(**dict(config_ini['Settings']))
+        except (ConfigError, KeyError, ValidationError, ValueError) as error:
+            logger.warning('settings.ini не применён: %s', error)
+            return None
+
+        self._config_ini = config_ini
+        self._config_dict = dict(config_ini['Settings'])
+        self.config = config
+        return config
+
     def save_settings(self, config_path):
         with open(config_path, 'w') as configfile:
             self._config_ini.write(configfile)
@@ -48,3 +97,51 @@ class Settings:
 
     def get_config(self):
         return self.config
+
+
+class SettingsWatcher(QObject):
+    """Следит за settings.ini и перечитывает его без перезапуска приложения."""
+
+    changed = pyqtSignal(object)
+
+    def __init__(self, settings, delay=200, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.path = os.path.abspath(settings.config_path)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(self.path)
+        # Редакторы часто пишут новый файл и переименовывают его, поэтому следим и за папкой
+        self.watcher.addPath(os.path.dirname(self.path))
+        self.watcher.fileChanged.connect(self.schedule_reload)
+        self.watcher.directoryChanged.connect(self.schedule_reload)
+
+        # Одно сохранение даёт несколько событий, перечитываем один раз
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.reload)
+        self.last_mtime = self.mtime()
+
+    def mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def schedule_reload(self, *args):
+        self.timer.start()
+
+    def reload(self):
+        if self.path not in self.watcher.files() and os.path.exists(self.path):
+            self.watcher.addPath(self.path)
+
+        mtime = self.mtime()
+        if mtime is None or mtime == self.last_mtime:
+            return
+        self.last_mtime = mtime
+
+        config = self.settings.reload()
+        if config is not None:
+            logger.info('Настройки перечитаны из %s', self.path)
+            self.changed.emit(config)
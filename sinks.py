@@ -0,0 +1,185 @@
+import logging
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QGuiApplication
+
+from encoder import PRESETS, encode, shared_service
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    '.png': PRESETS['png'],
+    '.jpg': PRESETS['jpeg'],
+    '.jpeg': PRESETS['jpeg'],
+    '.webp': PRESETS['webp_lossless'],
+}
+
+
+class OutputSink:
+    """Получатель готового скриншота. write вызывается из рабочего потока.
+
+    Получателю с preset SinkWorker отдаёт уже закодированный в общем пуле результат
+    через write_encoded; write кодирует сам, если получатель используется напрямую.
+    """
+
+    preset = None
+
+    def write(self, image):
+        self.write_encoded(encode(image, self.preset))
+
+    def write_encoded(self, result):
+        raise NotImplementedError
+
+
+class Win32ClipboardSink(OutputSink):
+    def write(self, image):
+        import win32clipboard
+
+        start = time.perf_counter()
+        data = self.to_dib(image)
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
+        finally:
+            win32clipboard.CloseClipboard()
+        logger.info('В буфер обмена: DIB %d байт за %.1f мс', len(data), (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def to_dib(image):
+        # BITMAPINFOHEADER + строки снизу вверх, без BMP-кодировщика
+        image = image.convertToFormat(QImage.Format_RGB32).mirrored(False, True)
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        header = struct.pack(
+            '<IiiHHIIiiII',
+            40, image.width(), image.height(), 1, 32, 0, image.sizeInBytes(), 0, 0, 0, 0,
+        )
+        return header + bytes(bits)
+
+
+class QtClipboardSink(QObject, OutputSink):
+    # QClipboard живёт в GUI-потоке, поэтому передаём картинку через сигнал
+    image_ready = pyqtSignal(QImage)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image_ready.connect(self.set_clipboard)
+
+    def write(self, image):
+        self.image_ready.emit(image)
+
+    def set_clipboard(self, image):
+        start = time.perf_counter()
+        QGuiApplication.clipboard().setImage(image)
+        logger.info(
+            'В буфер обмена: %dx%d, %d байт за %.1f мс',
+            image.width(), image.height(), image.sizeInBytes(), (time.perf_counter() - start) * 1000,
+        )
+
+
+class FileSink(OutputSink):
+    def __init__(self, path, preset=None):
+        self.path = path
+        # Без пресета формат берётся из расширения; неизвестное расширение - ошибка при записи
+        self.preset = preset or FORMATS.get(os.path.splitext(path)[1].lower())
+
+    def write(self, image):
+        if self.preset is None:
+            raise ValueError(f'Неизвестный формат файла: {self.path}')
+        super().write(image)
+
+    def write_encoded(self, result):
+        with open(self.path, 'wb') as output:
+            output.write(result.data)
+        logger.info('Сохранено %s: %d байт за %.1f мс', self.path, result.size, result.seconds * 1000)
+
+
+class StdoutSink(OutputSink):
+    def __init__(self, preset=PRESETS['png'], stream=None):
+        self.preset = preset
+        self.stream = stream
+
+    def write_encoded(self, result):
+        stream = self.stream or sys.stdout.buffer
+        stream.write(result.data)
+        stream.flush()
+
+
+class MemorySink(OutputSink):
+    def __init__(self, preset=None):
+        self.preset = preset
+        self.results = []
+
+    def write(self, image):
+        if self.preset:
+            super().write(image)
+        else:
+            self.results.append(image)
+
+    def write_encoded(self, result):
+        self.results.append(result)
+
+
+def clipboard_sink(backend=None):
+    """backend: 'win32', 'qt', 'memory' или None - выбрать по платформе."""
+    if backend == 'memory':
+        return MemorySink()
+    if backend == 'qt':
+        return QtClipboardSink()
+    if backend == 'win32':
+        return Win32ClipboardSink()
+
+    try:
+        import win32clipboard
+    except ImportError:
+        return QtClipboardSink()
+    return Win32ClipboardSink()
+
+
+class SinkWorker:
+    """Запись в получатели в отдельном потоке, оверлей закрывается сразу.
+
+    Кодирование уходит в общий EncodeService: несколько снимков подряд кодируются
+    параллельно, а пишутся по порядку в одном потоке.
+    """
+
+    def __init__(self, encoder=None):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sink')
+        self._encoder = encoder
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            self._encoder = shared_service()
+        return self._encoder
+
+    def submit(self, image, sinks):
+        sinks = list(sinks)
+        encoded = {sink: self.encoder.submit(image, sink.preset) for sink in sinks if sink.preset is not None}
+        return self.executor.submit(self.write_all, image, sinks, encoded)
+
+    def run(self, function, *args):
+        # Произвольная запись в том же потоке и порядке, что и обычные снимки
+        return self.executor.submit(function, *args)
+
+    @staticmethod
+    def write_all(image, sinks, encoded=None):
+        # encoded - future EncodeService для получателей с пресетом, остальные получают картинку
+        encoded = encoded or {}
+        for sink in sinks:
+            try:
+                if sink in encoded:
+                    sink.write_encoded(encoded[sink].result())
+                else:
+                    sink.write(image)
+            except Exception:
+                logger.exception('Ошибка записи скриншота в %s', type(sink).__name__)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,186 @@
+import math
+
+import numpy as np
+from PyQt5.QtCore import QRect, QPoint
+
+EDGE_THRESHOLD = 24  # перепад яркости (0-255), который считается краем
+MIN_LINE = 16  # минимальная длина линии в логических пикселях
+LINE_RATIO = 0.5  # какая доля стороны выделения должна лежать на линии
+MAX_CELLS = 2500000  # больше клеток - грубее сетка, чтобы индексы оставались небольшими
+MIN_REGION = 8
+
+
+def luminance(pixels):
+    # BGRA -> яркость, целочисленные веса BT.601
+    gray = pixels[..., 2].astype(np.uint16) * 77
+    gray += pixels[..., 1].astype(np.uint16) * 150
+    gray += pixels[..., 0].astype(np.uint16) * 29
+    return (gray >> 8).astype(np.int16)
+
+
+def edge_blocks(gray, block, axis, threshold=EDGE_THRESHOLD):
+    """Перепады яркости поперёк axis, сжатые в клетки block x block.
+
+    Возвращает маску клеток с краем и смещение края внутри клетки. Край с индексом k
+    проходит между пикселями k-1 и k.
+    """
+    grad = np.abs(np.diff(gray, axis=axis)) > threshold
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (1, 0)
+    grad = np.pad(grad, pad)
+
+    rows, cols = grad.shape[0] // block, grad.shape[1] // block
+    blocks = grad[:rows * block, :cols * block].reshape(rows, block, cols, block)
+    if axis == 0:
+        along = blocks.any(axis=3)
+        return along.any(axis=1), along.argmax(axis=1)
+    along = blocks.any(axis=1)
+    return along.any(axis=2), along.argmax(axis=2)
+
+
+def keep_runs(mask, length, axis):
+    """Оставляет только клетки, входящие в отрезок из length подряд идущих клеток вдоль axis."""
+    if length <= 1:
+        return mask
+    cells = np.moveaxis(mask, axis, 0)
+    count = cells.shape[0]
+    if count < length:
+        return np.zeros_like(mask)
+
+    prefix = np.zeros((count + 1,) + cells.shape[1:], dtype=np.int32)
+    np.cumsum(cells, axis=0, out=prefix[1:])
+    full = (prefix[length:] - prefix[:-length]) == length
+
+    starts = np.zeros((full.shape[0] + 1,) + cells.shape[1:], dtype=np.int32)
+    np.cumsum(full, axis=0, out=starts[1:])
+    index = np.arange(count)
+    high = np.minimum(index, count - length) + 1
+    low = np.maximum(index - length + 1, 0)
+    kept = (starts[high] - starts[low]) > 0
+    return np.moveaxis(kept, 0, axis)
+
+
+class EdgeIndex:
+    """Карта краёв снимка в логических координатах оверлея и индексы для поиска за O(1).
+
+    По строкам и столбцам хранятся префиксные суммы (насколько строка - линия на отрезке)
+    и ближайший край слева/справа/сверху/снизу от каждой клетки.
+    """
+
+    def __init__(self, width, height, step):
+        self.width = width
+        self.height = height
+        self.step = step
+        self.rows = math.ceil(height / step)
+        self.cols = math.ceil(width / step)
+
+        self.h_mask = np.zeros((self.rows, self.cols), dtype=bool)
+        self.v_mask = np.zeros((self.rows, self.cols), dtype=bool)
+        self.h_offset = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        self.v_offset = np.zeros((self.rows, self.cols), dtype=np.uint8)
+
+    @classmethod
+    def from_capture(cls, capture, threshold=EDGE_THRESHOLD, min_line=MIN_LINE):
+        size = capture.rect().size()
+        step = max(1, math.ceil(math.sqrt(size.width() * size.height() / MAX_CELLS)))
+        index = cls(size.width(), size.height(), step)
+        for frame in capture.frames:
+            index.add_frame(frame, threshold)
+        index.build(max(1, min_line // step))
+        return index
+
+    def add_frame(self, frame, threshold=EDGE_THRESHOLD):
+        pixels = np.frombuffer(frame.raw, dtype=np.uint8).reshape(frame.height, frame.width, 4)
+        gray = luminance(pixels)
+        block = max(1, round(self.step * frame.scale))
+        top = frame.geometry.y() // self.step
+        left = frame.geometry.x() // self.step
+
+        for axis, mask, offset in ((0, self.h_mask, self.h_offset), (1, self.v_mask, self.v_offset)):
+            cells, shift = edge_blocks(gray, block, axis, threshold)
+            rows = min(cells.shape[0], self.rows - top)
+            cols = min(cells.shape[1], self.cols - left)
+            mask[top:top + rows, left:left + cols] = cells[:rows, :cols]
+            # Смещение внутри клетки переводим из физических пикселей в логические
+            offset[top:top + rows, left:left + cols] = (shift[:rows, :cols] / frame.scale).astype(np.uint8)
+
+    def build(self, min_run):
+        self.h_mask = keep_runs(self.h_mask, min_run, axis=1)
+        self.v_mask = keep_runs(self.v_mask, min_run, axis=0)
+
+        dtype = np.int16 if max(self.rows, self.cols) < 2 ** 15 - 1 else np.int32
+        self.h_prefix = np.zeros((self.rows, self.cols + 1), dtype=dtype)
+        np.cumsum(self.h_mask, axis=1, out=self.h_prefix[:, 1:])
+        self.v_prefix = np.zeros((self.rows + 1, self.cols), dtype=dtype)
+        np.cumsum(self.v_mask, axis=0, out=self.v_prefix[1:])
+
+        cols = np.arange(self.cols, dtype=dtype)[None, :]
+        rows = np.arange(self.rows, dtype=dtype)[:, None]
+        self.left = np.maximum.accumulate(np.where(self.v_mask, cols, -1).astype(dtype), axis=1)
+        self.right = np.minimum.accumulate(np.where(self.v_mask, cols, self.cols).astype(dtype)[:, ::-1], axis=1)[:, ::-1]
+        self.up = np.maximum.accumulate(np.where(self.h_mask, rows, -1).astype(dtype), axis=0)
+        self.down = np.minimum.accumulate(np.where(self.h_mask, rows, self.rows).astype(dtype)[::-1], axis=0)[::-1]
+
+    def cell(self, value, limit):
+        return max(0, min(limit - 1, value // self.step))
+
+    def row_edge(self, row, col):
+        return row * self.step + (int(self.h_offset[row, col]) if self.h_mask[row, col] else 0)
+
+    def column_edge(self, col, row):
+        return col * self.step + (int(self.v_offset[row, col]) if self.v_mask[row, col] else 0)
+
+    def snap_y(self, y, x0, x1, radius):
+        """Ближайшая горизонтальная линия в пределах radius, покрывающая отрезок [x0, x1]."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        c0, c1 = self.cell(x0, self.cols), self.cell(x1, self.cols)
+        row = self.cell(y, self.rows)
+        need = max(1, math.ceil((c1 - c0 + 1) * LINE_RATIO))
+        middle = (c0 + c1) // 2
+
+        for distance in range(radius // self.step + 2):
+            for candidate in (row - distance, row + distance) if distance else (row,):
+                if not 0 <= candidate < self.rows:
+                    continue
+                if self.h_prefix[candidate, c1 + 1] - self.h_prefix[candidate, c0] < need:
+                    continue
+                edge = self.row_edge(candidate, middle)
+                if abs(edge - y) <= radius:
+                    return edge
+        return y
+
+    def snap_x(self, x, y0, y1, radius):
+        """Ближайшая вертикальная линия в пределах radius, покрывающая отрезок [y0, y1]."""
+        y0, y1 = min(y0, y1), max(y0, y1)
+        r0, r1 = self.cell(y0, self.rows), self.cell(y1, self.rows)
+        col = self.cell(x, self.cols)
+        need = max(1, math.ceil((r1 - r0 + 1) * LINE_RATIO))
+        middle = (r0 + r1) // 2
+
+        for distance in range(radius // self.step + 2):
+            for candidate in (col - distance, col + distance) if distance else (col,):
+                if not 0 <= candidate < self.cols:
+                    continue
+                if self.v_prefix[r1 + 1, candidate] - self.v_prefix[r0, candidate] < need:
+                    continue
+                edge = self.column_edge(candidate, middle)
+                if abs(edge - x) <= radius:
+                    return edge
+        return x
+
+    def region_at(self, pos):
+        """Прямоугольник, ограниченный ближайшими линиями вокруг точки, или None."""
+        col, row = self.cell(pos.x(), self.cols), self.cell(pos.y(), self.rows)
+        left, right = int(self.left[row, col]), int(self.right[row, col])
+        top, bottom = int(self.up[row, col]), int(self.down[row, col])
+        if left < 0 or top < 0 or right >= self.cols or bottom >= self.rows:
+            return None
+
+        x0 = left * self.step + int(self.v_offset[row, left])
+        x1 = right * self.step + int(self.v_offset[row, right])
+        y0 = top * self.step + int(self.h_offset[top, col])
+        y1 = bottom * self.step + int(self.h_offset[bottom, col])
+        if x1 - x0 < MIN_REGION or y1 - y0 < MIN_REGION:
+            return None
+        # Край k проходит перед пикселем k, поэтому правая и нижняя границы - k-1
+        return QRect(QPoint(x0, y0), QPoint(x1 - 1, y1 - 1))
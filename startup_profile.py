@@ -0,0 +1,121 @@
+"""Профиль холодного старта: какие импорты и этапы инициализации сколько стоят.
+
+    python startup_profile.py [--top 15] [--json startup.json] [--backend fake]
+
+Запускает приложение без хоткеев, ждёт окончания отложенной инициализации (трей, прогрев)
+и печатает время импортов (по тому, какой модуль проекта их вызвал) и этапов startup.*.
+"""
+import builtins
+import time
+
+PROCESS_START = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ImportTimer:
+    """Время первых импортов, сделанных из модулей проекта (включая вложенные)."""
+
+    def __init__(self):
+        self.timings = []
+        self._original = None
+
+    def install(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        builtins.__import__ = self._original
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        caller = (globals or {}).get('__file__') or ''
+        if level or name in sys.modules or not caller.startswith(PROJECT_DIR):
+            return self._original(name, globals, locals, fromlist, level)
+
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            module = os.path.splitext(os.path.basename(caller))[0]
+            self.timings.append((module, name, time.perf_counter() - start))
+
+    def top(self, count):
+        return sorted(self.timings, key=lambda timing: timing[2], reverse=True)[:count]
+
+
+def profile(top=15, backend='mss'):
+    timer = ImportTimer()
+    timer.install()
+
+    start = time.perf_counter()
+    from PyQt5.QtWidgets import QApplication
+    import main
+    from instrumentation import tracer
+    imports = time.perf_counter() - start
+
+    tracer.enable()
+    start = time.perf_counter()
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    qt_app = time.perf_counter() - start
+
+    from grabbers import create_grabber
+
+    start = time.perf_counter()
+    window = main.ScreenshotApp(grabber_factory=lambda: create_grabber(backend), hotkeys=False)
+    init = time.perf_counter() - start
+
+    # Первый проход цикла событий выполняет отложенную часть старта
+    start = time.perf_counter()
+    while not window.startup_finished:
+        app.processEvents()
+    deferred = time.perf_counter() - start
+    timer.uninstall()
+
+    stages = tracer.summary()['stages']
+    tracer.disable()
+    return {
+        'imports_ms': round(imports * 1000, 1),
+        'qapplication_ms': round(qt_app * 1000, 1),
+        'init_ms': round(init * 1000, 1),
+        'deferred_ms': round(deferred * 1000, 1),
+        'ready_ms': round((time.perf_counter() - PROCESS_START) * 1000, 1),
+        'stages': {name: stats['avg_ms'] for name, stats in stages.items() if name.startswith('startup.')},
+        'imports': [
+            {'from': module, 'module': name, 'ms': round(seconds * 1000, 1)}
+            for module, name, seconds in timer.top(top)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', help='записать результат в файл')
+    parser.add_argument('--backend', choices=['mss', 'fake'], default='mss', help='источник кадров для прогрева')
+    args = parser.parse_args()
+
+    report = profile(args.top, args.backend)
+    print(f"импорты            {report['imports_ms']:>8.1f} мс")
+    print(f"QApplication       {report['qapplication_ms']:>8.1f} мс")
+    print(f"ScreenshotApp      {report['init_ms']:>8.1f} мс")
+    print(f"отложенный старт   {report['deferred_ms']:>8.1f} мс")
+    print(f"готово через       {report['ready_ms']:>8.1f} мс")
+    print('\nэтапы:')
+    for name, ms in report['stages'].items():
+        print(f'  {name:<26} {ms:>8.1f} мс')
+    print('\nсамые дорогие импорты:')
+    for timing in report['imports']:
+        print(f"  {timing['from'] + ' -> ' + timing['module']:<40} {timing['ms']:>8.1f} мс")
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import math
+
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QPainterPath
+
+MIN_DISTANCE = 2.0  # pixels
+MAX_ANGLE = math.radians(8)
+RDP_TOLERANCE = 1.0  # pixels
+
+
+class StrokeBuilder:
+    """Онлайн-прореживание точек карандаша: близкие и почти коллинеарные точки не копятся."""
+
+    def __init__(self, start, min_distance=MIN_DISTANCE, max_angle=MAX_ANGLE):
+        self.min_distance = min_distance
+        self.max_angle = max_angle
+        self.points = [QPointF(start)]
+
+    def add(self, point):
+        """Возвращает отрезок (from, to), который надо дорисовать, или None."""
+        point = QPointF(point)
+        last = self.points[-1]
+        if distance(last, point) < self.min_distance:
+            return None
+
+        if len(self.points) >= 2:
+            before = self.points[-2]
+            if turn_angle(before, last, point) < self.max_angle:
+                # Продлеваем последний отрезок вместо новой точки
+                self.points[-1] = point
+                return last, point
+
+        self.points.append(point)
+        return last, point
+
+    def path(self, tolerance=RDP_TOLERANCE, smooth=False):
+        points = simplify(self.points, tolerance)
+        return build_path(points, smooth)
+
+
+def distance(a, b):
+    return math.hypot(b.x() - a.x(), b.y() - a.y())
+
+
+def turn_angle(a, b, c):
+    first = math.atan2(b.y() - a.y(), b.x() - a.x())
+    second = math.atan2(c.y() - b.y(), c.x() - b.x())
+    angle = abs(second - first)
+    return min(angle, 2 * math.pi - angle)
+
+
+def point_line_distance(point, start, end):
+    dx = end.x() - start.x()
+    dy = end.y() - start.y()
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return distance(point, start)
+    return abs(dy * point.x() - dx * point.y() + end.x() * start.y() - end.y() * start.x()) / length
+
+
+def simplify(points, tolerance=RDP_TOLERANCE):
+    # Рамер-Дуглас-Пекер без рекурсии
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_distance = 0.0
+        index = first
+        for i in range(first + 1, last):
+            d = point_line_distance(points[i], points[first], points[last])
+            if d > max_distance:
+                max_distance = d
+                index = i
+        if max_distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def build_path(points, smooth=False):
+    path = QPainterPath()
+    if not points:
+        return path
+
+    path.moveTo(points[0])
+    if not smooth or len(points) < 3:
+        for point in points[1:]:
+            path.lineTo(point)
+        return path
+
+    # Квадратичные кривые через середины отрезков
+    for i in range(1, len(points) - 1):
+        middle = (points[i] + points[i + 1]) / 2
+        path.quadTo(points[i], middle)
+    path.lineTo(points[-1])
+    return path
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# Тесты идут без дисплея; переменную надо выставить до создания QApplication
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def app():
+    from PyQt5.QtCore import QStandardPaths
+    from PyQt5.QtWidgets import QApplication
+
+    # Кэш, история и картинки - в тестовых папках, а не в профиле пользователя
+    QStandardPaths.setTestModeEnabled(True)
+    return QApplication.instance() or QApplication(sys.argv[:1])
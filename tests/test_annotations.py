@@ -0,0 +1,88 @@
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPainterPath, QPen
+
+from annotations import Annotation, AnnotationModel
+
+
+def line(x1, y1, x2, y2):
+    path = QPainterPath()
+    path.moveTo(x1, y1)
+    path.lineTo(x2, y2)
+    return Annotation('line', path, QPen(Qt.red, 3))
+
+
+def test_undo_redo():
+    model = AnnotationModel()
+    first = line(10, 10, 100, 10)
+    second = line(10, 50, 100, 50)
+    model.add(first)
+    model.add(second)
+
+    assert not model.undo().isEmpty()
+    assert model.items == [first]
+    assert model.redo_stack == [second]
+
+    model.redo()
+    assert model.items == [first, second]
+    assert not model.redo_stack
+
+
+def test_add_clears_redo():
+    model = AnnotationModel()
+    model.add(line(0, 0, 10, 10))
+    model.undo()
+    model.add(line(0, 0, 20, 20))
+    assert not model.redo_stack
+    assert model.redo().isEmpty()
+
+
+def test_undo_empty():
+    assert AnnotationModel().undo().isEmpty()
+
+
+def test_flush_rasterizes_only_touched_tiles():
+    model = AnnotationModel()
+    model.add(line(10, 10, 100, 10))
+    model.flush()
+    assert model.rasterized == 1
+    assert set(model.cache.tiles) == {(0, 0)}
+
+    model.add(line(600, 600, 700, 600))
+    model.flush()
+    assert set(model.cache.tiles) == {(0, 0), (2, 2)}
+
+
+def test_undo_repaints_stale_tiles():
+    model = AnnotationModel()
+    model.add(line(10, 10, 100, 10))
+    model.add(line(10, 20, 100, 20))
+    model.flush()
+    tile = model.cache.tiles[(0, 0)]
+    assert tile.pixelColor(50, 20).alpha() > 0
+
+    model.undo()
+    assert model.rasterized == 1
+    assert model.stale_keys == {(0, 0)}
+    model.flush()
+    tile = model.cache.tiles[(0, 0)]
+    assert tile.pixelColor(50, 20).alpha() == 0
+    assert tile.pixelColor(50, 10).alpha() > 0
+    assert not model.stale_keys
+
+
+def test_render_filters_kinds():
+    model = AnnotationModel()
+    model.add(line(10, 10, 100, 10))
+    painted = []
+
+    class Painter:
+        def setPen(self, pen):
+            pass
+
+        def drawPath(self, path):
+            painted.append(path)
+
+    model.render(Painter(), QRect(0, 0, 200, 200), kinds=('blur',))
+    assert not painted
+    model.render(Painter(), QRect(0, 0, 200, 200))
+    assert len(painted) == 1
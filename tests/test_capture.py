@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from capture import CaptureSession, CaptureWorker, monitor_rect
+from grabbers import FakeGrabber
+
+
+def settle(seconds):
+    # Даём рабочим потокам доделать своё и обрабатываем доставленные сигналы
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def worker():
+    # 640x480 по 500 нс на пиксель - около 150 мс на снимок
+    grabber = FakeGrabber([(640, 480)], ns_per_pixel=500)
+    session = CaptureSession(lambda: grabber)
+    session._layout = [(monitor, monitor_rect(monitor)) for monitor in grabber.monitors[1:]]
+    worker = CaptureWorker(session)
+    events = []
+    worker.captured.connect(lambda capture, started: events.append(('captured', capture)))
+    worker.failed.connect(lambda error: events.append(('failed', error)))
+    worker.events = events
+    yield worker
+    worker.shutdown()
+
+
+def test_repeated_requests_give_one_capture(worker):
+    assert worker.request(time.perf_counter())
+    assert not worker.request(time.perf_counter())
+    assert not worker.request(time.perf_counter())
+    settle(0.4)
+    assert [kind for kind, _ in worker.events] == ['captured']
+    assert not worker.busy
+
+
+def test_cancel_during_grab_is_silent(worker):
+    worker.request(time.perf_counter())
+    time.sleep(0.02)
+    worker.cancel()
+    assert not worker.busy
+    settle(0.4)
+    assert worker.events == []
+
+
+def test_cancel_before_grab_starts_is_silent(worker):
+    # Поток захвата занят, запрос ждёт в очереди и отменяется до начала
+    release = threading.Event()
+    worker.executor.submit(release.wait)
+    worker.request(time.perf_counter())
+    worker.cancel()
+    release.set()
+    settle(0.1)
+    assert worker.events == []
+
+
+def test_wait_delivers_directly(worker):
+    worker.request(time.perf_counter())
+    worker.wait()
+    assert [kind for kind, _ in worker.events] == ['captured']
+    capture = worker.events[0][1]
+    assert capture.rect().size().width() == 640
+    settle(0.05)
+    assert len(worker.events) == 1
+
+
+def test_grab_error_is_reported(worker):
+    def broken(layout):
+        raise OSError('нет доступа к экрану')
+
+    worker.session.grab_all = broken
+    worker.request(time.perf_counter())
+    settle(0.1)
+    assert worker.events == [('failed', 'нет доступа к экрану')]
@@ -0,0 +1,44 @@
+import json
+
+from PyQt5.QtGui import QImage
+
+import headless
+from grabbers import FakeGrabber
+
+
+def test_batch_writes_every_job(tmp_path):
+    grabber = FakeGrabber([(320, 200), (160, 100)])
+    notes = tmp_path / 'notes.json'
+    notes.write_text(json.dumps([{'type': 'line', 'points': [[0, 5], [50, 5]], 'color': '#00ff00', 'width': 3}]))
+    jobs = [
+        {'rect': '10,20,100,50', 'annotations': str(notes), 'out': str(tmp_path / 'rect.png')},
+        {'monitor': 2, 'out': str(tmp_path / 'second.jpg')},
+        {'monitor': 0, 'out': str(tmp_path / 'desktop.webp'), 'preset': 'png'},
+    ]
+    batch = tmp_path / 'jobs.json'
+    batch.write_text(json.dumps(jobs))
+
+    assert headless.main(['--batch', str(batch)], grabber=grabber) == 0
+    assert grabber.grabs == 3
+
+    rect = QImage(str(tmp_path / 'rect.png'))
+    assert (rect.width(), rect.height()) == (100, 50)
+    # Линия аннотации нарисована в координатах области
+    assert rect.pixelColor(20, 5).green() == 255 and rect.pixelColor(20, 5).red() == 0
+    # Без аннотации пиксель совпадает с источником
+    source = grabber.pixels[20 + 30, 10 + 20]
+    assert rect.pixelColor(20, 30).blue() == source[0]
+
+    second = QImage(str(tmp_path / 'second.jpg'))
+    assert (second.width(), second.height()) == (160, 100)
+    # Пресет задан явно, поэтому расширение .webp не влияет на формат
+    assert (tmp_path / 'desktop.webp').read_bytes().startswith(b'\x89PNG')
+
+
+def test_capture_region_with_fake_grabber():
+    grabber = FakeGrabber([(64, 32)], pattern='noise')
+    image = headless.capture_region({'left': 8, 'top': 4, 'width': 16, 'height': 8}, grabber=grabber)
+    assert (image.width(), image.height()) == (16, 8)
+    pixel = grabber.pixels[4, 8]
+    color = image.pixelColor(0, 0)
+    assert (color.blue(), color.green(), color.red()) == tuple(pixel[:3])
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pytest
+
+from capture import CapturedFrame, DesktopCapture
+from history import CaptureHistory
+
+
+def noise_capture(seed, width=64, height=48):
+    # Шум почти не сжимается, поэтому размер записи предсказуем
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+    return DesktopCapture([CapturedFrame(bytearray(pixels.tobytes()), width, height)])
+
+
+@pytest.fixture
+def history(tmp_path):
+    histories = []
+
+    def create(memory_limit=2 ** 30, disk_limit=2 ** 30, max_entries=50):
+        history = CaptureHistory(str(tmp_path), memory_limit, disk_limit, max_entries)
+        histories.append(history)
+        return history
+
+    yield create
+    for history in histories:
+        history.shutdown()
+
+
+def add(history, seed):
+    return history.add(noise_capture(seed)).result()
+
+
+def test_max_entries_drops_oldest(history):
+    captures = history(max_entries=2)
+    ids = [add(captures, seed) for seed in range(3)]
+    assert sorted(captures.entries) == ids[1:]
+
+
+def test_memory_limit_spills_oldest_to_disk(history, tmp_path):
+    captures = history(memory_limit=15000)
+    first = add(captures, 0)
+    second = add(captures, 1)
+    assert captures.entries[first].on_disk
+    assert not captures.entries[second].on_disk
+    assert captures.memory_bytes() <= 15000
+    assert os.listdir(tmp_path) == [f'capture_{first}_0.zlib']
+
+
+def test_spilled_entry_restores_pixels(history):
+    captures = history(memory_limit=0)
+    entry_id = add(captures, 3)
+    assert captures.entries[entry_id].on_disk
+    restored = captures.get(entry_id)
+    assert bytes(restored.frames[0].raw) == bytes(noise_capture(3).frames[0].raw)
+
+
+def test_disk_limit_removes_spilled_entries(history, tmp_path):
+    captures = history(memory_limit=0, disk_limit=15000)
+    ids = [add(captures, seed) for seed in range(3)]
+    assert list(captures.entries) == ids[2:]
+    assert captures.disk_bytes() <= 15000
+    assert os.listdir(tmp_path) == [f'capture_{ids[2]}_0.zlib']
+
+
+def test_get_refreshes_lru_order(history):
+    captures = history(memory_limit=25000)
+    first = add(captures, 0)
+    second = add(captures, 1)
+    captures.get(first)
+    add(captures, 2)
+    # Открытый снимок стал свежим, на диск ушёл второй
+    assert not captures.entries[first].on_disk
+    assert captures.entries[second].on_disk
+
+
+def test_old_spill_files_removed(history, tmp_path):
+    (tmp_path / 'capture_0_0.zlib').write_bytes(b'old')
+    (tmp_path / 'notes.txt').write_text('keep')
+    history()
+    assert os.listdir(tmp_path) == ['notes.txt']
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from hotkeys import HotkeyDispatcher
+
+
+class Target:
+    def __init__(self):
+        self.calls = []
+
+    def first(self):
+        self.calls.append(('first', threading.current_thread()))
+
+    def second(self):
+        self.calls.append(('second', threading.current_thread()))
+
+    def broken(self):
+        raise RuntimeError('сломалось')
+
+
+def process_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.002)
+
+
+def test_presses_from_other_thread_run_in_gui_thread_in_order():
+    target = Target()
+    dispatcher = HotkeyDispatcher(target, {})
+    presses = ['first', 'second', 'first']
+    thread = threading.Thread(target=lambda: [dispatcher.press(method) for method in presses])
+    thread.start()
+    thread.join()
+    # Из потока keyboard метод не вызывается, только ставится в очередь
+    assert target.calls == []
+
+    process_until(lambda: len(target.calls) == 3)
+    assert [name for name, _ in target.calls] == presses
+    assert all(caller is threading.main_thread() for _, caller in target.calls)
+    assert dispatcher.pressed is None
+
+
+def test_failing_handler_is_reported():
+    target = Target()
+    dispatcher = HotkeyDispatcher(target, {})
+    failures = []
+    dispatcher.failed.connect(lambda method, error: failures.append((method, error)))
+    dispatcher.press('broken')
+    dispatcher.press('second')
+
+    process_until(lambda: len(target.calls) == 1)
+    # Ошибка не роняет процесс и не мешает следующим нажатиям
+    assert failures == [('broken', 'сломалось')]
+    assert [name for name, _ in target.calls] == ['second']
+    assert dispatcher.pressed is None
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from PyQt5.QtCore import QRect
+from PyQt5.QtWidgets import QApplication
+
+from capture import monitor_rect
+from grabbers import FakeGrabber
+
+
+@pytest.fixture
+def window(tmp_path, monkeypatch):
+    from main import ScreenshotApp
+
+    # settings.ini создаётся в текущей папке
+    monkeypatch.chdir(tmp_path)
+
+    grabber = FakeGrabber([(640, 480), (320, 240)])
+    window = ScreenshotApp(grabber_factory=lambda: grabber, clipboard='memory', hotkeys=False)
+    # На offscreen один экран, раскладку берём у источника
+    window.capture._layout = [(monitor, monitor_rect(monitor)) for monitor in grabber.monitors[1:]]
+    yield window
+    window.close_screenshot()
+    window.capture_worker.shutdown()
+    window.output.shutdown()
+    window.shutdown()
+    window.deleteLater()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'не дождались'
+        QApplication.processEvents()
+        time.sleep(0.005)
+
+
+def open_overlay(window):
+    window.make_screenshot()
+    wait_for(lambda: window.is_screening)
+
+
+def test_prewarm_keeps_overlay_hidden(window):
+    while not window.startup_finished:
+        QApplication.processEvents()
+    window.prewarm()
+    assert not window.isVisible()
+    assert window.geometry() == window.capture.geometry()
+
+
+def test_settings_keep_qwidget_style(window):
+    while not window.startup_finished:
+        QApplication.processEvents()
+    window.apply_settings(window.settings.get_config())
+    # Стиль отрисовки не должен перекрывать QWidget.style()
+    assert window.style().objectName()
+    assert window.screenshot_label.style().objectName()
+
+
+def test_recording_stops_without_blocking_gui(window):
+    open_overlay(window)
+    window.rect_drawer.current_rect = QRect(10, 10, 64, 48)
+    window.toggle_recording()
+    recorder = window.recorder
+    assert recorder is not None
+
+    # Медленный диск: каждый кадр пишется 100 мс, очередь успевает накопиться
+    written = recorder.writer.write
+    recorder.writer.write = lambda frame: (time.sleep(0.1), written(frame))
+    wait_for(lambda: recorder.stats.captured >= 5)
+
+    messages = []
+    window.recording_finished.connect(lambda title, text: messages.append((title, text)))
+    start = time.perf_counter()
+    window.toggle_recording()
+    assert time.perf_counter() - start < 0.05
+    assert window.recorder is None
+
+    wait_for(lambda: messages)
+    title, text = messages[0]
+    assert title == 'Запись сохранена'
+    assert recorder.writer.path in text
+
+
+def test_repeated_f3_opens_one_capture(window):
+    captured = []
+    window.capture_worker.captured.connect(lambda capture, started: captured.append(capture))
+    # Медленный снимок: повторные F3 приходят, пока первый ещё снимается
+    window.capture.grabber().ns_per_pixel = 500
+    for _ in range(3):
+        window.make_screenshot()
+    wait_for(lambda: window.is_screening)
+    window.make_screenshot()
+    time.sleep(0.05)
+    QApplication.processEvents()
+    assert len(captured) == 1
@@ -0,0 +1,37 @@
+import shutil
+import time
+
+import pytest
+from PyQt5.QtGui import QColor, QImage
+from PyQt5.QtWidgets import QApplication
+
+from ocr import OcrService, grayscale_bytes
+
+
+def test_grayscale_bytes_drops_row_padding():
+    image = QImage(5, 3, QImage.Format_RGB32)
+    image.fill(QColor(255, 255, 255))
+    data, width, height = grayscale_bytes(image)
+    assert (width, height) == (5, 3)
+    assert data == b'\xff' * 15
+
+
+@pytest.mark.skipif(shutil.which('tesseract') is not None, reason='проверяется путь без tesseract')
+def test_extract_runs_in_spawned_worker():
+    service = OcrService()
+    errors = []
+    service.failed.connect(errors.append)
+    image = QImage(40, 20, QImage.Format_RGB32)
+    image.fill(QColor(255, 255, 255))
+    try:
+        future = service.extract(image)
+        # Процесс пула запускается через spawn, а не fork многопоточного родителя
+        assert service.executor._mp_context.get_start_method() == 'spawn'
+        with pytest.raises(FileNotFoundError):
+            future.result(timeout=60)
+        deadline = time.monotonic() + 5
+        while not errors and time.monotonic() < deadline:
+            QApplication.processEvents()
+        assert errors and 'tesseract' in errors[0]
+    finally:
+        service.shutdown()
@@ -0,0 +1,46 @@
+import numpy as np
+
+from recorder import AnimatedWriter, RecordedFrame, changed_tiles
+
+
+def test_changed_tiles_unchanged():
+    frame = np.zeros((64, 96, 4), dtype=np.uint8)
+    mask = changed_tiles(frame, frame.copy(), tile=32)
+    assert mask.shape == (2, 3)
+    assert not mask.any()
+
+
+def test_changed_tiles_marks_changed_tile():
+    previous = np.zeros((64, 96, 4), dtype=np.uint8)
+    current = previous.copy()
+    current[40, 70, 2] = 1
+    mask = changed_tiles(previous, current, tile=32)
+    assert mask.tolist() == [[False, False, False], [False, False, True]]
+
+
+def test_changed_tiles_partial_edge_tile():
+    # Размер не кратен тайлу: крайние тайлы неполные, но учитываются
+    previous = np.zeros((50, 70, 4), dtype=np.uint8)
+    current = previous.copy()
+    current[49, 69] = 255
+    mask = changed_tiles(previous, current, tile=32)
+    assert mask.shape == (2, 3)
+    assert mask[1, 2] and mask.sum() == 1
+
+
+def test_animated_writer_drops_frames_over_limit(tmp_path):
+    path = tmp_path / 'record.png'
+    # Три RGB-кадра 8x8 по 192 байта
+    writer = AnimatedWriter(str(path), memory_limit=3 * 8 * 8 * 3)
+    for index in range(5):
+        pixels = np.full((8, 8, 4), index * 40, dtype=np.uint8)
+        writer.write(RecordedFrame(index, index * 0.1, pixels, np.ones((1, 1), dtype=bool), True))
+    writer.close([0.1] * 5)
+
+    assert len(writer.images) == 3
+    assert writer.skipped == 2
+
+    from PIL import Image
+
+    with Image.open(path) as image:
+        assert image.n_frames == 3
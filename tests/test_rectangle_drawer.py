@@ -0,0 +1,66 @@
+from concurrent.futures import Future
+
+import pytest
+from PyQt5.QtCore import QPoint, QRect
+from PyQt5.QtWidgets import QWidget
+
+from rectangle_drawer import RectangleDrawer
+
+
+class LineIndex:
+    """Индекс с одной вертикальной и одной горизонтальной линией (края перед пикселями x и y)."""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def snap_x(self, x, y0, y1, radius):
+        return self.x if abs(self.x - x) <= radius else x
+
+    def snap_y(self, y, x0, x1, radius):
+        return self.y if abs(self.y - y) <= radius else y
+
+
+@pytest.fixture
+def drawer():
+    widget = QWidget()
+    widget.resize(800, 600)
+    drawer = RectangleDrawer(widget)
+    future = Future()
+    # Край 300 - между пикселями 299 и 300, край 200 - между 199 и 200
+    future.set_result(LineIndex(300, 200))
+    drawer.set_edge_index(future)
+    drawer.current_rect = QRect(QPoint(100, 100), QPoint(250, 150))
+    yield drawer
+    widget.deleteLater()
+
+
+def resize(drawer, side, pos):
+    drawer.resize_side = side
+    drawer.resize_rect(pos)
+    return drawer.current_rect
+
+
+def test_right_side_stops_before_edge(drawer):
+    assert resize(drawer, 'right', QPoint(296, 120)).right() == 299
+
+
+def test_bottom_side_stops_before_edge(drawer):
+    assert resize(drawer, 'bottom', QPoint(130, 204)).bottom() == 199
+
+
+def test_left_and_top_sides_start_at_edge(drawer):
+    drawer.current_rect = QRect(QPoint(310, 210), QPoint(400, 300))
+    assert resize(drawer, 'left', QPoint(303, 250)).left() == 300
+    assert resize(drawer, 'top', QPoint(350, 197)).top() == 200
+
+
+def test_corner_snaps_both_edges(drawer):
+    rect = resize(drawer, 'bottom_right', QPoint(305, 195))
+    assert (rect.right(), rect.bottom()) == (299, 199)
+    assert rect.topLeft() == QPoint(100, 100)
+
+
+def test_cursor_far_from_lines_is_kept(drawer):
+    rect = resize(drawer, 'bottom_right', QPoint(260, 160))
+    assert (rect.right(), rect.bottom()) == (260, 160)
@@ -0,0 +1,43 @@
+import numpy as np
+
+from redaction import block_means, box_blur, box_sizes
+
+
+def test_block_means_exact_blocks():
+    pixels = np.arange(16, dtype=np.uint8).reshape(4, 4, 1)
+    means = block_means(pixels, 2)
+    assert means[..., 0].tolist() == [[3, 5], [11, 13]]
+
+
+def test_block_means_pads_with_edge():
+    pixels = np.zeros((3, 3, 3), dtype=np.uint8)
+    pixels[2, :] = 200
+    means = block_means(pixels, 2)
+    assert means.shape == (2, 2, 3)
+    # Нижний блок дополнен крайней строкой, поэтому он весь из 200
+    assert means[1, 0, 0] == 200
+    assert means[0, 0, 0] == 0
+
+
+def test_box_blur_matches_naive_average():
+    values = np.random.default_rng(0).integers(0, 256, (7, 20, 3)).astype(np.int32)
+    size = 5
+    blurred = box_blur(values, size, axis=1)
+    padded = np.pad(values, ((0, 0), (2, 2), (0, 0)), mode='edge')
+    expected = np.stack([padded[:, x:x + size].sum(axis=1) for x in range(20)], axis=1)
+    assert blurred.shape == values.shape
+    assert np.array_equal(blurred, (expected + 2) // size)
+
+
+def test_box_blur_keeps_constant():
+    values = np.full((10, 10, 3), 77, dtype=np.int32)
+    assert np.array_equal(box_blur(values, 3, axis=0), values)
+
+
+def test_box_blur_size_one_is_identity():
+    values = np.arange(12, dtype=np.int32).reshape(3, 4, 1)
+    assert box_blur(values, 1, axis=0) is values
+
+
+def test_box_sizes_are_odd():
+    assert all(size % 2 == 1 for size in box_sizes(8))
@@ -0,0 +1,66 @@
+import numpy as np
+
+from PyQt5.QtGui import QImage
+
+from encoder import PRESETS
+from scroll_capture import ScrollStitcher, find_scroll, remove_stale_canvases, row_hashes
+from sinks import MemorySink
+
+
+def page(height=400, width=64, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+
+
+def test_find_scroll_same_frame():
+    hashes = row_hashes(page(100))
+    assert find_scroll(hashes, hashes.copy()) == 0
+
+
+def test_find_scroll_shift():
+    content = page()
+    previous = row_hashes(content[:200])
+    current = row_hashes(content[37:237])
+    assert find_scroll(previous, current) == 37
+
+
+def test_find_scroll_no_overlap():
+    previous = row_hashes(page(100, seed=1))
+    current = row_hashes(page(100, seed=2))
+    assert find_scroll(previous, current) is None
+
+
+def test_stitcher_appends_new_rows(tmp_path):
+    content = page()
+    stitcher = ScrollStitcher(content.shape[1], path=str(tmp_path / 'canvas.raw'), initial_rows=16)
+    try:
+        stitcher.add(content[:200])
+        stitcher.add(content[50:250])
+        stitcher.add(content[50:250])
+        assert stitcher.height == 250
+        assert stitcher.skipped == 1
+        assert np.array_equal(stitcher.canvas[:250], content[:250])
+    finally:
+        stitcher.close()
+    assert not (tmp_path / 'canvas.raw').exists()
+
+
+def test_save_writes_image_then_removes_canvas(tmp_path):
+    content = page()
+    stitcher = ScrollStitcher(content.shape[1], path=str(tmp_path / 'scroll_1.raw'), initial_rows=16)
+    stitcher.add(content[:200])
+    stitcher.add(content[50:250])
+    sink = MemorySink(PRESETS['png'])
+
+    stitcher.save([sink])
+
+    assert not (tmp_path / 'scroll_1.raw').exists()
+    assert stitcher.canvas is None
+    image = QImage.fromData(sink.results[0].data)
+    assert (image.width(), image.height()) == (64, 250)
+
+
+def test_remove_stale_canvases(tmp_path):
+    (tmp_path / 'scroll_old.raw').write_bytes(b'old')
+    (tmp_path / 'scroll_notes.txt').write_text('keep')
+    remove_stale_canvases(str(tmp_path))
+    assert [path.name for path in tmp_path.iterdir()] == ['scroll_notes.txt']
@@ -0,0 +1,76 @@
+import pytest
+from pydantic import ValidationError
+
+from settings import SettingModel, Settings
+
+
+@pytest.mark.parametrize('field, value', [
+    ('magnifier_zoom', 0),
+    ('magnifier_zoom', 33),
+    ('history_size', -1),
+    ('history_size', 0),
+    ('jpeg_quality', 101),
+    ('png_compression', 10),
+    ('pixelate_block', 0),
+    ('snap_radius', -1),
+])
+def test_numeric_fields_are_bounded(field, value):
+    with pytest.raises(ValidationError):
+        SettingModel(**{field: value})
+
+
+def test_out_of_range_file_falls_back_to_defaults(tmp_path):
+    path = tmp_path / 'settings.ini'
+    path.write_text('[Settings]\nmagnifier_zoom = 0\n')
+    assert Settings(str(path)).get_config() == SettingModel()
+
+
+def write_settings(path, body):
+    path.write_text('[Settings]\n' + body)
+    return str(path)
+
+
+@pytest.mark.parametrize('content', [
+    'draw_color = 0f0\n[Settings\n',
+    'line_size\n',
+    'no section header\n',
+    '[Other]\nline_size = 5\n',
+])
+def test_reload_keeps_previous_settings_on_malformed_file(tmp_path, content):
+    path = tmp_path / 'settings.ini'
+    settings = Settings(write_settings(path, 'draw_color = 0f0\n'))
+    before = settings.get_config()
+
+    path.write_text(content)
+    assert settings.reload() is None
+    assert settings.get_config() is before
+    assert before.draw_color == '0f0'
+
+
+def test_reload_applies_valid_file(tmp_path):
+    path = tmp_path / 'settings.ini'
+    settings = Settings(write_settings(path, 'line_size = 3\n'))
+    write_settings(path, 'line_size = 7\n')
+    config = settings.reload()
+    assert config is not None and config.line_size == 7
+    assert settings.get_config() is config
+
+
+def test_reload_rejects_unknown_image_format(tmp_path):
+    path = tmp_path / 'settings.ini'
+    settings = Settings(write_settings(path, 'image_format = jpeg\n'))
+    write_settings(path, 'image_format = bmp\n')
+    assert settings.reload() is None
+    assert settings.get_config().image_format == 'jpeg'
+
+
+def test_image_format_is_case_insensitive(tmp_path):
+    path = tmp_path / 'settings.ini'
+    settings = Settings(write_settings(path, 'image_format = png\n'))
+    write_settings(path, 'image_format = WebP\n')
+    assert settings.reload().image_format == 'webp'
+
+
+def test_unknown_image_format_at_startup_uses_defaults(tmp_path):
+    settings = Settings(write_settings(tmp_path / 'settings.ini', 'image_format = tiff\nline_size = 9\n'))
+    assert settings.get_config() == SettingModel()
@@ -0,0 +1,78 @@
+import struct
+
+from PyQt5.QtGui import QColor, QImage
+
+from encoder import PRESETS, EncodeService
+from sinks import FileSink, MemorySink, SinkWorker, Win32ClipboardSink
+
+
+def test_to_dib_header_and_rows():
+    image = QImage(3, 2, QImage.Format_RGB32)
+    image.fill(QColor(0, 0, 255))
+    image.setPixelColor(0, 0, QColor(255, 0, 0))
+
+    data = Win32ClipboardSink.to_dib(image)
+    header = struct.unpack('<IiiHHIIiiII', data[:40])
+    assert header[:7] == (40, 3, 2, 1, 32, 0, 3 * 2 * 4)
+    assert len(data) == 40 + 3 * 2 * 4
+
+    # Строки снизу вверх: верхний левый пиксель оказывается в начале последней строки, BGRA
+    rows = data[40:]
+    assert rows[12:16] == bytes([0, 0, 255, 255])
+    assert rows[0:4] == bytes([255, 0, 0, 255])
+
+
+def test_to_dib_converts_format():
+    image = QImage(4, 4, QImage.Format_ARGB32)
+    image.fill(QColor(10, 20, 30))
+    data = Win32ClipboardSink.to_dib(image)
+    assert data[40:44] == bytes([30, 20, 10, 255])
+
+
+def test_memory_sink_encodes_with_preset():
+    image = QImage(8, 8, QImage.Format_RGB32)
+    image.fill(QColor(1, 2, 3))
+    sink = MemorySink(PRESETS['png'])
+    sink.write(image)
+    assert sink.results[0].data.startswith(b'\x89PNG')
+
+
+class CountingService(EncodeService):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.presets = []
+
+    def submit(self, image, preset=PRESETS['png']):
+        self.presets.append(preset)
+        return super().submit(image, preset)
+
+
+def test_sink_worker_encodes_through_service(tmp_path):
+    image = QImage(8, 8, QImage.Format_RGB32)
+    image.fill(QColor(1, 2, 3))
+    service = CountingService()
+    worker = SinkWorker(service)
+    plain = MemorySink()
+    encoded = MemorySink(PRESETS['jpeg'])
+    path = tmp_path / 'shot.png'
+
+    worker.submit(image, [plain, encoded, FileSink(str(path))]).result()
+    worker.shutdown()
+    service.shutdown()
+
+    # Картинка без пресета не кодируется, остальные - через пул
+    assert service.presets == [PRESETS['jpeg'], PRESETS['png']]
+    assert plain.results == [image]
+    assert encoded.results[0].data.startswith(b'\xff\xd8')
+    assert path.read_bytes().startswith(b'\x89PNG')
+
+
+def test_file_sink_unknown_extension_is_reported(tmp_path):
+    image = QImage(4, 4, QImage.Format_RGB32)
+    worker = SinkWorker(CountingService())
+    after = MemorySink()
+    worker.submit(image, [FileSink(str(tmp_path / 'shot.bmpx')), after]).result()
+    worker.shutdown()
+    # Ошибка одного получателя не мешает остальным
+    assert after.results == [image]
+    assert not (tmp_path / 'shot.bmpx').exists()
@@ -0,0 +1,37 @@
+from PyQt5.QtCore import QPointF
+
+from stroke import StrokeBuilder, simplify
+
+
+def points(*coordinates):
+    return [QPointF(x, y) for x, y in coordinates]
+
+
+def test_simplify_keeps_short_input():
+    line = points((0, 0), (5, 5))
+    assert simplify(line) == line
+
+
+def test_simplify_drops_collinear_points():
+    line = points(*((x, 0) for x in range(20)))
+    assert simplify(line) == points((0, 0), (19, 0))
+
+
+def test_simplify_keeps_corner():
+    corner = points((0, 0), (5, 0), (10, 0), (10, 5), (10, 10))
+    assert simplify(corner) == points((0, 0), (10, 0), (10, 10))
+
+
+def test_simplify_respects_tolerance():
+    bump = points((0, 0), (5, 0.5), (10, 0))
+    assert len(simplify(bump, tolerance=1.0)) == 2
+    assert len(simplify(bump, tolerance=0.1)) == 3
+
+
+def test_builder_skips_close_points():
+    builder = StrokeBuilder(QPointF(0, 0))
+    assert builder.add(QPointF(1, 0)) is None
+    assert builder.add(QPointF(10, 0)) is not None
+    # Почти коллинеарная точка продлевает последний отрезок
+    builder.add(QPointF(20, 0.1))
+    assert len(builder.points) == 2
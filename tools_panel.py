@@ -2,9 +2,26 @@ from PyQt5.QtCore import pyqtSignal, QPoint
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QWidget, QPushButton, QVBoxLayout, QGraphicsGridLayout, QGridLayout
 
+TOOL_ICONS = {
+    'pencil': 'tool_panel_icons/pen_icon.png',
+    'line': 'tool_panel_icons/line_icon.png',
+    'rectangle': 'tool_panel_icons/rectangle_icon.png',
+}
+
+_icon_cache = {}
+
+
+def tool_icon(action):
+    # Иконки читаются с диска один раз на процесс и только когда понадобились
+    icon = _icon_cache.get(action)
+    if icon is None:
+        icon = _icon_cache[action] = QIcon(TOOL_ICONS[action])
+    return icon
+
 
 class PanelTools(QWidget):
     change_action = pyqtSignal(str)
+    extract_text = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -46,32 +63,61 @@ class PanelTools(QWidget):
 
         self.btn_pencil = QPushButton()
         self.btn_pencil.setCheckable(True)
-        self.btn_pencil.setIcon(QIcon("tool_panel_icons/pen_icon.png"))
         self.btn_pencil.clicked.connect(lambda: self.change_mouse_action('pencil', self.btn_pencil))
 
         self.btn_line = QPushButton()
         self.btn_line.setCheckable(True)
-        self.btn_line.setIcon(QIcon("tool_panel_icons/line_icon.png"))
         self.btn_line.clicked.connect(lambda: self.change_mouse_action('line', self.btn_line))
 
         self.btn_rectangle = QPushButton()
         self.btn_rectangle.setCheckable(True)
-        self.btn_rectangle.setIcon(QIcon("tool_panel_icons/rectangle_icon.png"))
         self.btn_rectangle.clicked.connect(lambda: self.change_mouse_action('rectangle', self.btn_rectangle))
 
+        # Пикселизация и размытие области, рисуются как фигуры
+        self.btn_pixelate = QPushButton('Px')
+        self.btn_pixelate.setCheckable(True)
+        self.btn_pixelate.setToolTip('Пикселизация')
+        self.btn_pixelate.clicked.connect(lambda: self.change_mouse_action('pixelate', self.btn_pixelate))
+
+        self.btn_blur = QPushButton('Bl')
+        self.btn_blur.setCheckable(True)
+        self.btn_blur.setToolTip('Размытие')
+        self.btn_blur.clicked.connect(lambda: self.change_mouse_action('blur', self.btn_blur))
+
+        # Не инструмент, а действие: распознать текст в выделении
+        self.btn_text = QPushButton('T')
+        self.btn_text.setToolTip('Распознать текст')
+        self.btn_text.clicked.connect(self.extract_text.emit)
+
         self.menu_layout = QVBoxLayout()
         self.menu_layout.addWidget(self.btn_pencil)
         self.menu_layout.addWidget(self.btn_line)
         self.menu_layout.addWidget(self.btn_rectangle)
+        self.menu_layout.addWidget(self.btn_pixelate)
+        self.menu_layout.addWidget(self.btn_blur)
+        self.menu_layout.addWidget(self.btn_text)
 
         layout = QGridLayout()
         layout.addLayout(self.menu_layout, 1, 1)
         self.setLayout(layout)
         self.setFixedWidth(70)
+        self.icons_loaded = False
+
+    def load_icons(self):
+        if self.icons_loaded:
+            return
+        self.btn_pencil.setIcon(tool_icon('pencil'))
+        self.btn_line.setIcon(tool_icon('line'))
+        self.btn_rectangle.setIcon(tool_icon('rectangle'))
+        self.icons_loaded = True
+
+    def showEvent(self, event):
+        self.load_icons()
+        super().showEvent(event)
 
     def change_mouse_action(self, action, active_button):
         current_pos = self.pos()
-        for button in [self.btn_pencil, self.btn_line, self.btn_rectangle]:
+        for button in [self.btn_pencil, self.btn_line, self.btn_rectangle, self.btn_pixelate, self.btn_blur]:
             if button != active_button:
                 button.setChecked(False)
 